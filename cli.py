@@ -26,13 +26,12 @@ from core import (
     create_acronym_mnemonic, get_example_difference,
     save_syllabus_to_markdown
 )
-from core.models import ExamPattern, ExamSection, AnalyzedQuestion
+from core.models import ExamPattern, ExamSection, AnalyzedQuestionList
 from core.gemini_processor import GeminiProcessor, create_subject_folder
-from core.rag import RAGEngine
 from core.exam_analysis import QuestionPaperAnalyzer
 from visual import create_simple_mindmap, create_tcp_handshake_animation, create_stack_animation
 from visual.mindmap_v2 import MindMapGenerator2
-from core.utils import get_subject_dir
+from core.utils import get_subject_dir, configure_logging, safe_module_dirname, safe_topic_filename
 
 app = typer.Typer(help="AI Learning Engine CLI")
 console = Console()
@@ -143,10 +142,12 @@ def ingest_paper(
         
     # Save to KB
     kb = KnowledgeBase()
-    kb.save_analyzed_questions(questions, current_subject)
+    added = kb.save_analyzed_questions(questions, current_subject)
     
     # Summary
     console.print(f"[green]Extracted {len(questions)} questions.[/green]")
+    if added < len(questions):
+        console.print(f"[yellow]Skipped {len(questions) - added} questions already in the bank for this paper.[/yellow]")
     for q in questions:
         console.print(f" - Q{q.number} ({q.module}): {q.text[:50]}...")
         
@@ -173,7 +174,7 @@ def get_pyq_answers(
         console.print("[red]No analyzed questions found. Use 'ingest-paper' first.[/red]")
         return
         
-    questions = [AnalyzedQuestion(**q) for q in raw_data]
+    questions = AnalyzedQuestionList.validate_python(raw_data)
     
     # Filter
     if module:
@@ -337,11 +338,10 @@ def generate_mindmap_v2(
         base_dir = Path(subject_data['folder_path']) / "notes"
         
         for i, module in enumerate(syllabus.modules, 1):
-            safe_mod_name = module.name.replace(":", " -").replace("/", "-").strip()
+            safe_mod_name = safe_module_dirname(module.name)
             
             for j, topic in enumerate(module.topics, 1):
-                safe_topic_name = topic.name.replace("/", "-").strip()
-                safe_topic_name = "".join([c for c in safe_topic_name if c.isalpha() or c.isdigit() or c in (' ', '-', '_')]).strip()
+                safe_topic_name = safe_topic_filename(topic.name)
                 
                 # Construct path
                 file_path = base_dir / safe_mod_name / f"{j}. {safe_topic_name}_mermaid.md"
@@ -436,15 +436,21 @@ def ask_youtube(
     If 'query' is provided, answers the question using RAG.
     """
     _init_gemini_model() # Ensure env vars are loaded
+    from core.rag import RAGEngine
     rag = RAGEngine()
     
     if query:
         # Q&A Mode
         console.print(f"[cyan]Processing video: {url}[/cyan]")
         console.print("[yellow]This may take a moment (launching browser to fetch subs)...[/yellow]")
-        answer = rag.ask_youtube(url, query)
         console.print("\n[bold green]Answer:[/bold green]")
-        console.print(answer)
+        # Print the answer as it streams in rather than after it completes
+        try:
+            for chunk in rag.ask_youtube_stream(url, query):
+                console.print(chunk, end="", markup=False)
+        finally:
+            rag.close()
+        console.print()
         return
 
     # Learning Workflow Mode
@@ -464,7 +470,10 @@ def ask_youtube(
     console.print(f"[cyan]Analyzing video for topic '{topic}' in subject '{current_subject}'...[/cyan]")
     
     # Analyze Video
-    result = rag.analyze_video_structure(url, topic)
+    try:
+        result = rag.analyze_video_structure(url, topic)
+    finally:
+        rag.close()
     
     if "error" in result:
         console.print(f"[red]Error: {result['error']}[/red]")
@@ -542,9 +551,8 @@ def _find_topic_path(subject_name: str, topic_name: str) -> tuple[Optional[str],
         for j, t in enumerate(module.topics, 1):
             if t.name.lower() == topic_name.lower():
                 # Reconstruct path logic from save_syllabus_to_markdown
-                safe_mod_name = module.name.replace(":", " -").replace("/", "-").strip()
-                safe_topic_name = t.name.replace("/", "-").strip()
-                safe_topic_name = "".join([c for c in safe_topic_name if c.isalpha() or c.isdigit() or c in (' ', '-', '_')]).strip()
+                safe_mod_name = safe_module_dirname(module.name)
+                safe_topic_name = safe_topic_filename(t.name)
                 
                 full_path_prefix = base_dir / safe_mod_name / f"{j}. {safe_topic_name}"
                 return module.name, str(full_path_prefix)
@@ -561,11 +569,15 @@ def quiz_youtube(
     Generate a quiz from a YouTube video.
     """
     _init_gemini_model()
+    from core.rag import RAGEngine
     rag = RAGEngine()
     console.print(f"[cyan]Generating {num} questions from: {url}[/cyan]")
     console.print("[yellow]Fetching content and generating quiz...[/yellow]")
     
-    questions = rag.generate_quiz_from_video(url, num)
+    try:
+        questions = rag.generate_quiz_from_video(url, num)
+    finally:
+        rag.close()
     
     if not questions:
         console.print("[red]Failed to generate questions.[/red]")
@@ -581,9 +593,9 @@ def quiz_youtube(
         
         if save:
             q.topic = f"YouTube: {url}" # Or a better identifier
-            kb.save_question(q)
             
     if save:
+        kb.save_questions(questions)
         console.print(f"\n[green]Saved {len(questions)} questions to knowledge base.[/green]")
 
 
@@ -700,13 +712,14 @@ def create_subject(
     
     # Save topics to Knowledge Base
     kb = KnowledgeBase()
-    topic_count = 0
+    all_topics = []
     for module in syllabus.modules:
         for topic in module.topics:
             topic.module_id = module.id
             # topic.module_name = module.name # If we add this field for convenience
-            kb.save_topic(topic)
-            topic_count += 1
+            all_topics.append(topic)
+    kb.save_topics(all_topics)
+    topic_count = len(all_topics)
             
     console.print(f"[cyan]Extracted {len(syllabus.modules)} modules and {topic_count} topics[/cyan]")
 
@@ -1028,9 +1041,9 @@ def show_difference(example: str = "tcp_vs_udp"):
     
     for item in diff.differences:
         table.add_row(
-            item["aspect"],
-            item["concept_a_value"],
-            item["concept_b_value"]
+            item.aspect,
+            item.concept_a_value,
+            item.concept_b_value
         )
     
     console.print(table)
@@ -1058,14 +1071,13 @@ def load_syllabus(file_path: str):
     try:
         syllabus = load_syllabus_from_json(file_path)
         
-        for topic in syllabus.topics:
-            kb.save_topic(topic)
+        kb.save_topics(syllabus.topics)
         
         console.print(f"[green]Loaded {len(syllabus.topics)} topics from {file_path}[/green]")
     except FileNotFoundError:
         console.print(f"[red]Error: File not found at {file_path}[/red]")
-    except json.JSONDecodeError:
-        console.print(f"[red]Error: Could not decode JSON from {file_path}[/red]")
+    except ValidationError as e:
+        console.print(f"[red]Error: Could not decode syllabus JSON from {file_path}: {e}[/red]")
     except Exception as e:
         console.print(f"[red]An unexpected error occurred: {e}[/red]")
 
@@ -1123,6 +1135,7 @@ def main(ctx: typer.Context):
                 break
 
 if __name__ == "__main__":
+    configure_logging()
     try:
         app()
     except Exception as e:
@@ -1,11 +1,20 @@
 """
 Core module for the AI Learning Engine.
 """
-from .models import Topic, Syllabus, Question, Mnemonic, DifferenceTable, AnimationScript, Subject, Module
+from .models import Topic, Syllabus, Question, Mnemonic, DifferenceAspect, DifferenceTable, AnimationScript, Subject, Module
 from .ingest import KnowledgeBase, load_syllabus_from_json, save_syllabus_to_json, save_syllabus_to_markdown
 from .mnemonics import create_acronym_mnemonic, create_difference_table, get_example_difference
-from .rag import RAGEngine
-from .utils import normalize_subject_name, get_subject_dir
+from .utils import normalize_subject_name, get_subject_dir, configure_logging
+
+
+def __getattr__(name):
+    # core.rag pulls in LangChain, FAISS, OpenCV and Tesseract; only load it
+    # when RAGEngine is actually used, not on every `import core`.
+    if name == "RAGEngine":
+        from .rag import RAGEngine
+        return RAGEngine
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     'Topic',
@@ -14,6 +23,7 @@ __all__ = [
     'Module',
     'Question',
     'Mnemonic',
+    'DifferenceAspect',
     'DifferenceTable',
     'AnimationScript',
     'KnowledgeBase',
@@ -25,5 +35,6 @@ __all__ = [
     'get_example_difference',
     'RAGEngine',
     'normalize_subject_name',
-    'get_subject_dir'
+    'get_subject_dir',
+    'configure_logging'
 ]
@@ -1,7 +1,6 @@
 """
 Module for parsing and analyzing question papers (PYQs).
 """
-import fitz  # PyMuPDF
 import json
 import logging
 import re
@@ -13,11 +12,52 @@ from google.genai import types
 from icecream import ic
 ic.disable()
 from core.models import ExamPattern, AnalyzedQuestion, QuestionBank
+from core import pdf_cache
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Four-digit years 19xx/20xx. Non-capturing so findall/group(0) yield the full year.
+_YEAR_RE = re.compile(r'\b(?:19|20)\d{2}\b')
+
+# Below this size a paper that mentions at most one year is treated as a
+# single section and parsed with one call.
+SINGLE_PAPER_MAX_CHARS = 8000
+
+FULL_TEXT_PROMPT = """
+Extract all examination questions from the following text, which may contain multiple consecutive question papers from different years.
+
+For each question, identify:
+- Year: Infer from the nearest header, section title, or context (e.g., '2020' if the question appears under a '2020' paper section). If unclear, use 'Unknown'.
+- Question Number (integer)
+- Part/Sub-question (e.g., 'a', 'b', or null)
+- The exact Text of the question
+- Marks allocated (integer, infer from context if possible, else 0)
+
+Ignore instructions like "Answer all questions" or extraneous header information.
+Focus on the numbered questions. Group questions by their inferred year where possible.
+
+Text:
+{}
+"""
+
+SECTION_PROMPT = """
+Extract all examination questions from the following text section.
+
+Use the year: {} for all questions in this section.
+
+For each question, identify:
+- Question Number (integer)
+- Part/Sub-question (e.g., 'a', 'b', or null)
+- The exact Text of the question
+- Marks allocated (integer, infer from context if possible, else 0)
+
+Ignore instructions like "Answer all questions" or extraneous header information.
+Focus on the numbered questions.
+
+Text:
+{}
+"""
+
 
 class QuestionPaperAnalyzer:
     def __init__(self, api_key: str):
@@ -26,28 +66,25 @@ class QuestionPaperAnalyzer:
             temperature=0.2,  # Deterministic for extraction
             google_api_key=api_key
         )
+        # Schema binding is done once; every paper (and every fallback
+        # section) reuses the same structured runnable.
+        self._qbank_llm = self.llm.with_structured_output(QuestionBank)
 
     def extract_text(self, pdf_path: str) -> str:
-        """Extracts text from a PDF file."""
-        doc = fitz.open(pdf_path)
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        return text
+        """Extracts text from a PDF file (cached by file content)."""
+        return pdf_cache.get_text(pdf_path)
 
     def _extract_year_sections(self, text: str, default_year: str) -> List[Tuple[str, str]]:
         """
         Splits the text into sections based on detected year headers using regex.
         Each section is a tuple of (inferred_year, section_text).
         """
-        year_pattern = r'\b(19|20)\d{2}\b'
-        matches = list(re.finditer(year_pattern, text))
+        positions = [m.start() for m in _YEAR_RE.finditer(text)]
 
-        if not matches:
+        if not positions:
             return [(default_year, text)]
 
         sections = []
-        positions = [m.start() for m in matches]
 
         for i in range(len(positions) + 1):
             start = positions[i - 1] if i > 0 else 0
@@ -58,43 +95,62 @@ class QuestionPaperAnalyzer:
                 continue
 
             # Infer year for this section: use the year at the start of the section
-            year_match = re.search(year_pattern, section_text[:500])  # Check first 500 chars for header
-            year = year_match.group(1) if year_match else default_year
+            year_match = _YEAR_RE.search(section_text, 0, 500)  # Check first 500 chars for header
+            year = year_match.group(0) if year_match else default_year
             sections.append((year, section_text))
 
         return sections
 
+    def _parse_sections(self, sections: List[Tuple[str, str]], paper_name: str) -> List[AnalyzedQuestion]:
+        """
+        Runs the per-section prompt over (year, text) sections and tags the results.
+        """
+        all_questions = []
+        for sec_year, sec_text in sections:
+            if not sec_text.strip():
+                continue
+            try:
+                sub_prompt = SECTION_PROMPT.format(sec_year, sec_text)
+                sub_result = self._qbank_llm.invoke(sub_prompt)
+                ic("Invoked LLM for year section:", sec_year)
+                sub_questions = sub_result.questions
+
+                for q in sub_questions:
+                    q.year = sec_year
+                    q.paper_name = paper_name
+                    all_questions.append(q)
+
+                logger.info(f"Successfully parsed section for year {sec_year} with {len(sub_questions)} questions.")
+            except Exception as sub_e:
+                logger.error(f"Failed to parse section for year {sec_year}: {sub_e}")
+                continue
+        return all_questions
+
     def parse_questions_from_text(self, text: str, year: str, paper_name: str) -> List[AnalyzedQuestion]:
         """
         Uses Gemini to extract structured questions from raw text.
         """
+        # Small papers that mention at most one year go straight to the
+        # single-section prompt: there is nothing to split, and skipping the
+        # multi-paper prompt avoids a second round-trip when it fails. An
+        # empty result still goes on to the full-text parse below.
+        # The caller's year wins; a year found in the text is only a fallback.
+        if len(text) < SINGLE_PAPER_MAX_CHARS:
+            years = set(_YEAR_RE.findall(text))
+            if len(years) <= 1:
+                sec_year = year if year != "Unknown" else (years.pop() if years else year)
+                questions = self._parse_sections([(sec_year, text)], paper_name)
+                if questions:
+                    return questions
+                logger.warning("Single-section parse found no questions. Trying full text parsing.")
+
         # Chunking strategy: If text is too long, we might need to split.
         # But Flash context is huge, so we try sending whole text first.
         # If it fails, we fall back to year-wise splitting.
-
-        base_prompt = """
-        Extract all examination questions from the following text, which may contain multiple consecutive question papers from different years.
-
-        For each question, identify:
-        - Year: Infer from the nearest header, section title, or context (e.g., '2020' if the question appears under a '2020' paper section). If unclear, use 'Unknown'.
-        - Question Number (integer)
-        - Part/Sub-question (e.g., 'a', 'b', or null)
-        - The exact Text of the question
-        - Marks allocated (integer, infer from context if possible, else 0)
-
-        Ignore instructions like "Answer all questions" or extraneous header information.
-        Focus on the numbered questions. Group questions by their inferred year where possible.
-
-        Text:
-        {}
-        """
-
-        structured_llm = self.llm.with_structured_output(QuestionBank)
-
         try:
-            prompt = base_prompt.format(text)
+            prompt = FULL_TEXT_PROMPT.format(text)
             ic("Invoking LLM for full text parsing...")
-            result = structured_llm.invoke(prompt)
+            result = self._qbank_llm.invoke(prompt)
             questions = result.questions
             ic(f"LLM returned {len(questions)} questions from full text.")
             # Post-process to add metadata, with fallback for year
@@ -109,44 +165,7 @@ class QuestionPaperAnalyzer:
 
             # Fallback: Split into year sections and parse each
             sections = self._extract_year_sections(text, year)
-            all_questions = []
-
-            fallback_prompt_template = """
-            Extract all examination questions from the following text section.
-
-            Use the year: {} for all questions in this section.
-
-            For each question, identify:
-            - Question Number (integer)
-            - Part/Sub-question (e.g., 'a', 'b', or null)
-            - The exact Text of the question
-            - Marks allocated (integer, infer from context if possible, else 0)
-
-            Ignore instructions like "Answer all questions" or extraneous header information.
-            Focus on the numbered questions.
-
-            Text:
-            {}
-            """
-
-            for sec_year, sec_text in sections:
-                if not sec_text.strip():
-                    continue
-                try:
-                    sub_prompt = fallback_prompt_template.format(sec_year, sec_text)
-                    sub_result = structured_llm.invoke(sub_prompt)
-                    ic("Invoked LLM for year section:", sec_year)
-                    sub_questions = sub_result.questions
-
-                    for q in sub_questions:
-                        q.year = sec_year
-                        q.paper_name = paper_name
-                        all_questions.append(q)
-
-                    logger.info(f"Successfully parsed section for year {sec_year} with {len(sub_questions)} questions.")
-                except Exception as sub_e:
-                    logger.error(f"Failed to parse section for year {sec_year}: {sub_e}")
-                    continue
+            all_questions = self._parse_sections(sections, paper_name)
 
             logger.info(f"Fallback parsing completed. Total questions extracted: {len(all_questions)}")
             return all_questions
@@ -5,18 +5,17 @@ import json
 import os
 import hashlib
 import logging
-logging.basicConfig(filename='gemini_processor.log', level=logging.INFO)
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Union, Type, TypeVar
 from pathlib import Path
 from .models import Syllabus, Topic
-from .utils import normalize_subject_name, get_subject_dir
+from .utils import normalize_subject_name, get_subject_dir, strip_json_fence
 from google import genai
 from google.genai import types
 import google.genai
 from pydantic import BaseModel as PydanticModel
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+ModelT = TypeVar("ModelT", bound=PydanticModel)
+
 logger = logging.getLogger(__name__)
 
 CACHE_DIR = Path("data/cache/gemini")
@@ -129,7 +128,7 @@ Return the result as a valid JSON object matching the following structure:
 }}
 """
 
-    def _call_gemini_with_schema(self, prompt: str, schema_cls: Any) -> Any:
+    def _call_gemini_with_schema(self, prompt: str, schema_cls: Type[ModelT]) -> ModelT:
         """
         Call Gemini model and parse the response into a Pydantic model.
         Uses local caching to reduce calls.
@@ -160,26 +159,13 @@ Return the result as a valid JSON object matching the following structure:
 
         # 4. Parse Response
         try:
-            # Clean up potential markdown blocks if the model ignored JSON mode (less likely with config)
-            cleaned_text = response_text.strip()
-            if cleaned_text.startswith("```json"):
-                cleaned_text = cleaned_text[7:]
-            if cleaned_text.endswith("```"):
-                cleaned_text = cleaned_text[:-3]
-            cleaned_text = cleaned_text.strip()
-            
-            # Using Pydantic's model_validate_json or parse_raw (older pydantic)
-            # Checking pydantic version in requirements was 2.5.3, so model_validate_json is preferred
-            try:
-                parsed_obj = schema_cls.model_validate_json(cleaned_text)
-            except AttributeError:
-                # Fallback for older Pydantic V1 if environment differs
-                parsed_obj = schema_cls.parse_raw(cleaned_text)
-                
+            # JSON mode should return bare JSON, but tolerate a fenced reply
+            parsed_obj = schema_cls.model_validate_json(strip_json_fence(response_text))
+
             # Save debug dump
             try:
                 with open(f"{schema_cls.__name__}.json", "w", encoding="utf-8") as f:
-                    json.dump(parsed_obj.model_dump(), f, indent=2, ensure_ascii=False)
+                    f.write(parsed_obj.model_dump_json(indent=2))
             except Exception as e:
                 logger.warning(f"Could not save debug JSON: {e}")
                 print(parsed_obj)
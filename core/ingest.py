@@ -1,187 +1,324 @@
 """
 Module for ingesting and processing syllabus data.
 """
-import json
+import os
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
-from .models import Topic, Syllabus, Question
-from .utils import get_subject_dir
+from typing import Any, Dict, List, Optional
+from pydantic import ValidationError
+from .models import Topic, Syllabus, Question, AnalyzedQuestion, AnalyzedQuestionList, QuestionBank
+from .utils import get_subject_dir, safe_module_dirname, safe_topic_filename
 import uuid
+import orjson
+
+# Buffer size for the Markdown note writers
+_WRITE_BUFFER = 1 << 16
+
+
+@lru_cache(maxsize=4096)
+def _parse_row(data: bytes) -> Dict[str, Any]:
+    # Keyed on the stored JSON itself, so a changed row is simply a new key.
+    # Callers validate a new model from the dict and never modify it.
+    return orjson.loads(data)
 
 
 class KnowledgeBase:
     """
     Manages storage and retrieval of knowledge data.
+
+    A single SQLite connection is opened per instance and shared by all
+    methods; access is serialized with a lock so the instance can be used
+    from Streamlit's script threads.
     """
+    # Hot-path statements. sqlite3 caches prepared statements per connection
+    # keyed on the exact SQL text, so every call site uses these constants.
+    _SQL_SAVE_TOPIC = "INSERT OR REPLACE INTO topics (id, name, summary, data) VALUES (?, ?, ?, ?)"
+    _SQL_SAVE_QUESTION = "INSERT OR REPLACE INTO questions (id, topic, question, answer, data) VALUES (?, ?, ?, ?, ?)"
+    _SQL_GET_TOPICS = "SELECT data FROM topics"
+    _SQL_GET_TOPIC = "SELECT data FROM topics WHERE id = ?"
+    _SQL_GET_QUESTIONS = "SELECT data FROM questions"
+    _SQL_GET_QUESTIONS_BY_TOPIC = "SELECT data FROM questions WHERE topic = ?"
+    _SQL_SAVE_ANALYZED = "INSERT OR REPLACE INTO analyzed_questions (id, subject, data) VALUES (?, ?, ?)"
+    _SQL_IMPORT_ANALYZED = "INSERT OR IGNORE INTO analyzed_questions (id, subject, data) VALUES (?, ?, ?)"
+    _SQL_GET_ANALYZED = "SELECT data FROM analyzed_questions WHERE subject = ? ORDER BY rowid"
+
     def __init__(self, db_path: str = "data/memory.db"):
         self.db_path = db_path
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode: each statement commits on its own, no implicit BEGIN
+        self._conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None, cached_statements=128
+        )
+        self._lock = threading.Lock()
         self._init_db()
     
     def _init_db(self):
         """Initialize SQLite database with required tables."""
-        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Topics table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS topics (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                summary TEXT,
-                data JSON,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Questions table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS questions (
-                id TEXT PRIMARY KEY,
-                topic TEXT,
-                question TEXT,
-                answer TEXT,
-                data JSON,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
+        with self._lock:
+            cursor = self._conn.cursor()
+
+            # WAL + relaxed sync: commits no longer fsync the main file and
+            # readers don't block the writer. These persist on this connection.
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.execute("PRAGMA cache_size=-131072")  # 128 MB page cache keeps the tables resident
+            cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+            
+            # Topics table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS topics (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    summary TEXT,
+                    data BLOB,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # Questions table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS questions (
+                    id TEXT PRIMARY KEY,
+                    topic TEXT,
+                    question TEXT,
+                    answer TEXT,
+                    data BLOB,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_questions_topic ON questions(topic)")
+
+            # Analyzed exam questions, appended per subject
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS analyzed_questions (
+                    id TEXT PRIMARY KEY,
+                    subject TEXT NOT NULL,
+                    data BLOB
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_aq_subject ON analyzed_questions(subject)")
+
+    @contextmanager
+    def _transaction(self):
+        """Run a block of statements as one explicit transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    @staticmethod
+    def _validate_cached(model_cls, data):
+        """Build a fresh model for a row, reusing the parsed JSON of unchanged rows."""
+        return model_cls.model_validate(_parse_row(data))
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            # Let SQLite refresh planner statistics gathered during this session
+            self._conn.execute("PRAGMA optimize")
+            self._conn.close()
     
     def save_topic(self, topic: Topic) -> None:
         """Save a topic to the database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         topic_id = topic.id or str(uuid.uuid4())
         topic.id = topic_id
         
-        cursor.execute("""
-            INSERT OR REPLACE INTO topics (id, name, summary, data)
-            VALUES (?, ?, ?, ?)
-        """, (topic_id, topic.name, topic.summary, topic.model_dump_json()))
-        
-        conn.commit()
-        conn.close()
+        with self._lock:
+            self._conn.execute(self._SQL_SAVE_TOPIC, (topic_id, topic.name, topic.summary, topic.model_dump_json().encode()))
     
     def save_question(self, question: Question) -> None:
         """Save a question to the database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         question_id = question.id or str(uuid.uuid4())
         question.id = question_id
         
-        cursor.execute("""
-            INSERT OR REPLACE INTO questions (id, topic, question, answer, data)
-            VALUES (?, ?, ?, ?, ?)
-        """, (question_id, question.topic, question.question, question.answer, question.model_dump_json()))
-        
-        conn.commit()
-        conn.close()
+        with self._lock:
+            self._conn.execute(self._SQL_SAVE_QUESTION, (question_id, question.topic, question.question, question.answer, question.model_dump_json().encode()))
+    
+    def save_topics(self, topics: List[Topic]) -> None:
+        """Save many topics in a single transaction."""
+        rows = []
+        for topic in topics:
+            topic.id = topic.id or str(uuid.uuid4())
+            rows.append((topic.id, topic.name, topic.summary, topic.model_dump_json().encode()))
+
+        with self._transaction() as conn:
+            conn.executemany(self._SQL_SAVE_TOPIC, rows)
+
+    def save_questions(self, questions: List[Question]) -> None:
+        """Save many questions in a single transaction."""
+        rows = []
+        for question in questions:
+            question.id = question.id or str(uuid.uuid4())
+            rows.append((question.id, question.topic, question.question, question.answer, question.model_dump_json().encode()))
+
+        with self._transaction() as conn:
+            conn.executemany(self._SQL_SAVE_QUESTION, rows)
     
     def get_topics(self) -> List[Topic]:
         """Retrieve all topics from the database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT data FROM topics")
-        rows = cursor.fetchall()
-        conn.close()
+        with self._lock:
+            rows = self._conn.execute(self._SQL_GET_TOPICS).fetchall()
         
-        return [Topic.model_validate_json(row[0]) for row in rows]
+        return [self._validate_cached(Topic, row[0]) for row in rows]
     
     def get_topic(self, topic_id: str) -> Optional[Topic]:
         """Retrieve a specific topic by ID."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT data FROM topics WHERE id = ?", (topic_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with self._lock:
+            row = self._conn.execute(self._SQL_GET_TOPIC, (topic_id,)).fetchone()
         
         if row:
-            return Topic.model_validate_json(row[0])
+            return self._validate_cached(Topic, row[0])
         return None
     
     def get_questions(self, topic: Optional[str] = None) -> List[Question]:
         """Retrieve questions, optionally filtered by topic."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        if topic:
-            cursor.execute("SELECT data FROM questions WHERE topic = ?", (topic,))
-        else:
-            cursor.execute("SELECT data FROM questions")
+        with self._lock:
+            if topic:
+                rows = self._conn.execute(self._SQL_GET_QUESTIONS_BY_TOPIC, (topic,)).fetchall()
+            else:
+                rows = self._conn.execute(self._SQL_GET_QUESTIONS).fetchall()
         
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [Question.model_validate_json(row[0]) for row in rows]
+        return [self._validate_cached(Question, row[0]) for row in rows]
     
-    def save_analyzed_questions(self, questions: List['AnalyzedQuestion'], subject_name: str) -> None:
-        """Save analyzed exam questions to a subject-specific JSON file using QuestionBank model."""
-        from .models import QuestionBank, AnalyzedQuestion
-        
+    def _migrate_question_bank(self, subject_name: str) -> None:
+        """
+        One-time import of a legacy questions/question_bank.json into SQLite.
+
+        The file is renamed to question_bank.json.migrated afterwards so the
+        import never runs twice.
+        """
         path = get_subject_dir(subject_name) / "questions/question_bank.json"
-        path.parent.mkdir(parents=True, exist_ok=True)
-        
-        current_bank = QuestionBank(questions=[])
-        
-        if path.exists():
-            with open(path, "r", encoding="utf-8") as f:
-                try:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        # Migration: Convert old list format to QuestionBank
-                        # Ensure we validate/convert dicts to AnalyzedQuestion
-                        validated_qs = [AnalyzedQuestion(**q) for q in data]
-                        current_bank.questions = validated_qs
-                    elif isinstance(data, dict):
-                        current_bank = QuestionBank(**data)
-                except Exception as e:
-                    print(f"Error loading existing question bank: {e}")
-        
-        # Merge new questions
-        # Simple append. De-duplication could be added here based on ID or content.
-        current_bank.questions.extend(questions)
-        
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(current_bank.model_dump(), f, indent=2, default=str)
+        if not path.exists():
+            return
+
+        raw = path.read_bytes()
+        try:
+            # Old files are either a bare list or a QuestionBank object;
+            # both are parsed and validated directly from bytes.
+            if raw.lstrip().startswith(b"["):
+                legacy = AnalyzedQuestionList.validate_json(raw)
+            else:
+                legacy = QuestionBank.model_validate_json(raw).questions
+        except ValidationError as e:
+            print(f"Error loading existing question bank: {e}")
+            return
+
+        rows = [(q.id, subject_name, q.model_dump_json().encode()) for q in legacy]
+        with self._transaction() as conn:
+            conn.executemany(self._SQL_IMPORT_ANALYZED, rows)
+        os.replace(path, path.with_suffix(".json.migrated"))
+
+    def save_analyzed_questions(self, questions: List[AnalyzedQuestion], subject_name: str) -> int:
+        """
+        Append analyzed exam questions to the subject's question bank.
+
+        Returns the number of questions actually added (duplicates are skipped).
+        """
+        self._migrate_question_bank(subject_name)
+
+        # Re-ingesting the same paper must not grow the bank: skip any question
+        # whose (year, paper, number, part, text) is already stored or repeated
+        # in this batch. The same question in another year's paper is kept, as
+        # repeats across years are what the analysis looks for.
+        seen = {
+            (q.get("year"), q.get("paper_name"), q["number"], q.get("part"), q["text"])
+            for q in self.get_analyzed_questions(subject_name)
+        }
+        rows = []
+        for q in questions:
+            key = (q.year, q.paper_name, q.number, q.part, q.text)
+            if key in seen:
+                continue
+            seen.add(key)
+            rows.append((q.id, subject_name, q.model_dump_json().encode()))
+        with self._transaction() as conn:
+            conn.executemany(self._SQL_SAVE_ANALYZED, rows)
+        return len(rows)
 
     def get_analyzed_questions(self, subject_name: str) -> List[dict]:
         """Retrieve analyzed questions for a subject."""
-        path = get_subject_dir(subject_name) / "questions/question_bank.json"
-        if not path.exists():
-            return []
-            
-        with open(path, "r", encoding="utf-8") as f:
-            try:
-                data = json.load(f)
-                if isinstance(data, list):
-                    return data
-                elif isinstance(data, dict):
-                    # It's likely a QuestionBank
-                    return data.get("questions", [])
-            except Exception:
-                return []
+        self._migrate_question_bank(subject_name)
+
+        with self._lock:
+            rows = self._conn.execute(self._SQL_GET_ANALYZED, (subject_name,)).fetchall()
+        return [orjson.loads(row[0]) for row in rows]
+
+
+@lru_cache(maxsize=16)
+def _read_syllabus_bytes(file_path: str, mtime_ns: int, size: int) -> bytes:
+    with open(file_path, 'rb') as f:
+        return f.read()
 
 
 def load_syllabus_from_json(file_path: str) -> Syllabus:
-    """Load a syllabus from a JSON file."""
-    with open(file_path, 'r',encoding='utf-8') as f:
-        data = json.load(f)
-    return Syllabus(**data)
+    """
+    Load a syllabus from a JSON file.
+
+    The file's bytes are memoized on its path, mtime and size, so repeated
+    loads of an unchanged file (Streamlit reruns, CLI helpers) skip the read.
+    Each call validates a fresh Syllabus, which callers may modify; this is
+    cheaper than deep-copying a cached model.
+    """
+    stat = os.stat(file_path)
+    data = _read_syllabus_bytes(os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+    # pydantic-core parses the bytes straight into the model; no intermediate dict tree
+    return Syllabus.model_validate_json(data)
 
 
 def save_syllabus_to_json(syllabus: Syllabus, file_path: str) -> None:
     """Save a syllabus to a JSON file."""
     Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+    # Serialize in pydantic-core: datetimes are formatted in Rust instead of
+    # through a json.dump(default=str) callback per timestamp.
     with open(file_path, 'w',encoding='utf-8') as f:
-        json.dump(syllabus.model_dump(), f, indent=2, default=str)
+        f.write(syllabus.model_dump_json(indent=2))
+
+
+def _write_text(path: Path, text: str) -> None:
+    """Write a whole file in one call through a large buffer."""
+    with open(path, 'w', encoding='utf-8', buffering=_WRITE_BUFFER) as f:
+        f.write(text)
+
+
+def _render_topic_markdown(topic: Topic, module_name: str) -> str:
+    """Render one topic note as a Markdown string (no I/O)."""
+    chunks = [
+        f"# {topic.name}\n\n",
+        f"**Module:** {module_name}\n\n",
+        f"**Summary:** {topic.summary}\n\n",
+    ]
+    
+    if topic.key_points:
+        chunks.append("## Key Points\n")
+        chunks.extend(f"- {kp}\n" for kp in topic.key_points)
+        chunks.append("\n")
+    
+    if topic.mnemonics:
+        chunks.append("## Mnemonics\n")
+        chunks.extend(f"- **{m}**\n" for m in topic.mnemonics)
+        chunks.append("\n")
+    
+    if topic.mermaid_diagrams:
+        chunks.append("## Visualizations\n")
+        for diag in topic.mermaid_diagrams:
+            chunks.append(f"### {diag.title or diag.type.capitalize()}\n")
+            chunks.append(f"```mermaid\n{diag.script}\n```\n\n")
+    
+    if topic.questions:
+        chunks.append("## Practice Questions\n")
+        chunks.extend(f"- {q}\n" for q in topic.questions)
+        chunks.append("\n")
+
+    return "".join(chunks)
 
 
 def save_syllabus_to_markdown(syllabus: Syllabus, output_dir: str) -> None:
@@ -192,70 +329,39 @@ def save_syllabus_to_markdown(syllabus: Syllabus, output_dir: str) -> None:
     base_dir.mkdir(parents=True, exist_ok=True)
     
     # Subject Index (Readme)
-    with open(base_dir / "README.md", 'w', encoding='utf-8') as f:
-        f.write(f"# {syllabus.title}\n\n")
-        if syllabus.description:
-            f.write(f"{syllabus.description}\n\n")
-        f.write("## Modules\n")
-        for m in syllabus.modules:
-            f.write(f"- [{m.name}]({m.name}/README.md)\n")
+    chunks = [f"# {syllabus.title}\n\n"]
+    if syllabus.description:
+        chunks.append(f"{syllabus.description}\n\n")
+    chunks.append("## Modules\n")
+    chunks.extend(f"- [{m.name}]({m.name}/README.md)\n" for m in syllabus.modules)
+    _write_text(base_dir / "README.md", "".join(chunks))
 
+    # Pure compute pass: module folders/indexes are created and every topic
+    # note is rendered up front, so the write phase below is I/O only.
+    pending = []
     for i, module in enumerate(syllabus.modules, 1):
         # Create Module Folder
-        safe_mod_name = module.name.replace(":", " -").replace("/", "-").strip()
+        safe_mod_name = safe_module_dirname(module.name)
         mod_dir = base_dir / safe_mod_name
         mod_dir.mkdir(parents=True, exist_ok=True)
         
         # Module Index
-        with open(mod_dir / "README.md", 'w', encoding='utf-8') as f:
-            f.write(f"# {module.name}\n\n")
-            if module.description:
-                f.write(f"{module.description}\n\n")
-            f.write("## Topics\n")
-            for t in module.topics:
-                safe_t_name = t.name.replace("/", "-").strip()
-                f.write(f"- [{t.name}]({i}.{safe_t_name}.md)\n")
+        chunks = [f"# {module.name}\n\n"]
+        if module.description:
+            chunks.append(f"{module.description}\n\n")
+        chunks.append("## Topics\n")
+        for t in module.topics:
+            safe_t_name = t.name.replace("/", "-").strip()
+            chunks.append(f"- [{t.name}]({i}.{safe_t_name}.md)\n")
+        pending.append((mod_dir / "README.md", "".join(chunks)))
 
         # Topic Files
         for j, topic in enumerate(module.topics, 1):
-            safe_topic_name = topic.name.replace("/", "-").strip()
-            # Ensure filename is valid
-            safe_topic_name = "".join([c for c in safe_topic_name if c.isalpha() or c.isdigit() or c in (' ', '-', '_')]).strip()
+            safe_topic_name = safe_topic_filename(topic.name)
             topic_file = mod_dir / f"{j}. {safe_topic_name}.md"
-            
-            with open(topic_file, 'w', encoding='utf-8') as f:
-                f.write(f"# {topic.name}\n\n")
-                f.write(f"**Module:** {module.name}\n\n")
-                f.write(f"**Summary:** {topic.summary}\n\n")
-                
-                if topic.key_points:
-                    f.write("## Key Points\n")
-                    for kp in topic.key_points:
-                        f.write(f"- {kp}\n")
-                    f.write("\n")
-                
-                if topic.mnemonics:
-                    f.write("## Mnemonics\n")
-                    for m in topic.mnemonics:
-                        f.write(f"- **{m}**\n")
-                    f.write("\n")
-                
-                if topic.mermaid_diagrams:
-                    f.write("## Visualizations\n")
-                    for diag in topic.mermaid_diagrams:
-                        # Handle both dictionary (legacy) and MermaidDiagram object
-                        if isinstance(diag, dict):
-                            title = diag.get('title') or diag.get('type', 'Diagram').capitalize()
-                            script = diag.get('script')
-                        else:
-                            title = diag.title or diag.type.capitalize()
-                            script = diag.script
-                            
-                        f.write(f"### {title}\n")
-                        f.write(f"```mermaid\n{script}\n```\n\n")
-                
-                if topic.questions:
-                    f.write("## Practice Questions\n")
-                    for q in topic.questions:
-                        f.write(f"- {q}\n")
-                    f.write("\n")
+            pending.append((topic_file, _render_topic_markdown(topic, module.name)))
+
+    # Files are independent of each other, so keep several writes in flight.
+    # list() drains the iterator so the first write error is re-raised here.
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda item: _write_text(*item), pending))
@@ -1,8 +1,8 @@
 """
 Module for generating and managing mnemonics and memory aids.
 """
-from typing import List
-from .models import Mnemonic, DifferenceTable
+from typing import List, Optional, Union
+from .models import Mnemonic, DifferenceAspect, DifferenceTable
 
 
 def create_acronym_mnemonic(topic: str, key_points: List[str]) -> Mnemonic:
@@ -24,8 +24,8 @@ def create_acronym_mnemonic(topic: str, key_points: List[str]) -> Mnemonic:
             explanation="No key points provided"
         )
     
-    # Extract first letters
-    acronym = "".join([point[0].upper() for point in key_points if point])
+    # Extract first letters (upper-cased once on the joined string)
+    acronym = "".join(point[0] for point in key_points if point).upper()
     
     return Mnemonic(
         topic=topic,
@@ -35,14 +35,14 @@ def create_acronym_mnemonic(topic: str, key_points: List[str]) -> Mnemonic:
     )
 
 
-def create_difference_table(concept_a: str, concept_b: str, aspects: List[dict]) -> DifferenceTable:
+def create_difference_table(concept_a: str, concept_b: str, aspects: List[Union[DifferenceAspect, dict]]) -> DifferenceTable:
     """
     Create a comparison table between two concepts.
     
     Args:
         concept_a: First concept name
         concept_b: Second concept name
-        aspects: List of difference aspects with keys 'aspect', 'concept_a_value', 'concept_b_value'
+        aspects: DifferenceAspect rows, or dicts with keys 'aspect', 'concept_a_value', 'concept_b_value'
         
     Returns:
         A DifferenceTable object
@@ -78,9 +78,10 @@ EXAMPLE_DIFFERENCES = {
 }
 
 
-def get_example_difference(key: str) -> DifferenceTable:
+# Built once at import; callers get the shared (read-only) instances
+EXAMPLE_DIFFERENCES_CACHED = {k: DifferenceTable(**v) for k, v in EXAMPLE_DIFFERENCES.items()}
+
+
+def get_example_difference(key: str) -> Optional[DifferenceTable]:
     """Get an example difference table by key."""
-    if key in EXAMPLE_DIFFERENCES:
-        data = EXAMPLE_DIFFERENCES[key]
-        return DifferenceTable(**data)
-    return None
+    return EXAMPLE_DIFFERENCES_CACHED.get(key)
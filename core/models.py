@@ -1,7 +1,7 @@
 """
 Pydantic models for structured knowledge representation.
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from typing import List, Optional, Literal, Dict
 from datetime import datetime
 import uuid
@@ -55,13 +55,22 @@ class Module(BaseModel):
     order: int = 0
 
 
+class DifferenceAspect(BaseModel):
+    """
+    One row of a comparison table.
+    """
+    aspect: str
+    concept_a_value: str
+    concept_b_value: str
+
+
 class DifferenceTable(BaseModel):
     """
     Represents a comparison table between concepts.
     """
     concept_a: str
     concept_b: str
-    differences: List[dict] = Field(default_factory=list, description="List of difference aspects")
+    differences: List[DifferenceAspect] = Field(default_factory=list, description="List of difference aspects")
     
     
 class Mnemonic(BaseModel):
@@ -193,3 +202,8 @@ class QuestionBank(BaseModel):
     Collection of analyzed questions.
     """
     questions: List[AnalyzedQuestion] = Field(default_factory=list)
+
+
+# Validates a whole list of question dicts (or raw JSON bytes) in one
+# pydantic-core call instead of one AnalyzedQuestion(**q) per element.
+AnalyzedQuestionList = TypeAdapter(List[AnalyzedQuestion])
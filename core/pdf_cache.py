@@ -0,0 +1,72 @@
+"""
+Disk cache for text extracted from PDF files.
+
+Entries are keyed by a hash of the file contents, so re-running an analysis on
+the same paper (or a renamed copy of it) skips PyMuPDF entirely.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+from pathlib import Path
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path("data/cache/pdf")
+
+
+def file_digest(pdf_path: str) -> str:
+    """
+    Hash the raw bytes of a file with BLAKE2b.
+
+    The file is memory-mapped so large scans are hashed without being read
+    into a Python bytes object first.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open(pdf_path, "rb") as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+        except ValueError:
+            # mmap refuses zero-length files; the empty digest is fine for those
+            pass
+    return h.hexdigest()
+
+
+def get_text(pdf_path: str, cache_dir: Path = CACHE_DIR) -> str:
+    """
+    Return the text layer of a PDF, extracting it only on a cache miss.
+
+    Args:
+        pdf_path: Path to the PDF file
+        cache_dir: Directory holding the cached `<digest>.txt` files
+
+    Returns:
+        Concatenated text of all pages
+    """
+    key = file_digest(pdf_path)
+    cache_file = cache_dir / f"{key}.txt"
+    if cache_file.exists():
+        logger.info(f"PDF text cache hit for {pdf_path} ({key})")
+        return cache_file.read_text(encoding="utf-8")
+
+    with fitz.open(pdf_path) as doc:
+        text = "".join(page.get_text() for page in doc)
+
+    # Written to a temp file and renamed into place, so a crash or a
+    # concurrent writer never leaves a truncated entry behind
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, cache_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        logger.warning(f"Failed to write PDF text cache: {e}")
+    return text
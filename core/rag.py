@@ -2,42 +2,68 @@
 Module for RAG (Retrieval Augmented Generation) functionality.
 Includes PDF text extraction (with OCR fallback) and YouTube search integration.
 """
-import time
 import os
+
+# OCR runs one page per process/thread; letting every Tesseract instance
+# also spawn its own OpenMP threads oversubscribes the CPU. Set before
+# tesserocr loads libtesseract (and inherited by pytesseract's subprocesses
+# and pool workers); an explicit value in the environment still wins.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
 import json
+import orjson
+import hashlib
+import re
+import shutil
+import csv
+import io
 import asyncio
-from typing import List, Optional, Dict, Any
+import tempfile
+import uuid
+import threading
+from collections import defaultdict, deque
+from functools import lru_cache
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Dict, Any, Sequence
 from urllib.parse import quote
 from pathlib import Path
 import logging
 import fitz  # PyMuPDF
 import pytesseract
-from PIL import Image
 import numpy as np
-from googletrans import Translator
+import pandas as pd
+import cv2
 from tqdm import tqdm
 
 # LangChain & Gemini Imports
+import faiss
 from langchain_community.vectorstores import FAISS
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-# from langchain import RecursiveCharacterTextSplitter
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.documents import Document
 from langchain_core.prompts import PromptTemplate
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import HumanMessage
 from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
-from langchain_core.runnables import RunnableParallel, RunnablePassthrough, RunnableLambda
+from langchain_core.runnables import RunnableLambda
 from langchain_core.output_parsers import StrOutputParser
 
+from langchain_classic.embeddings import CacheBackedEmbeddings
+from langchain_classic.storage import LocalFileStore
 from langchain_classic.retrievers import ContextualCompressionRetriever
-from langchain_classic.retrievers.document_compressors import LLMChainExtractor
+from langchain_classic.retrievers.document_compressors import DocumentCompressorPipeline, EmbeddingsFilter
+from langchain_community.document_transformers import EmbeddingsRedundantFilter
 # from langchain.retrievers import ContextualCompressionRetriever
-# from langchain.retrievers.document_compressors import LLMChainExtractor
+# from langchain.retrievers.document_compressors import EmbeddingsFilter
 
 from langchain_huggingface.embeddings import HuggingFaceEmbeddings
 
 from core.models import Topic, Question
+from core.utils import strip_json_fence
+from core import pdf_cache
 from visual.cli_viz import single_line_viz
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 try:
@@ -47,152 +73,1043 @@ except ImportError:
     HAS_DRISSION = False
     logger.warning("DrissionPage not found. YouTube search will be limited.")
 
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """Fallback when numba is not installed: run the function as plain Python."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+try:
+    from ocr_stringdist import WeightedLevenshtein
+    HAS_OCR_STRINGDIST = True
+except ImportError:
+    HAS_OCR_STRINGDIST = False
+
+try:
+    import ray
+    HAS_RAY = True
+except ImportError:
+    HAS_RAY = False
+
+try:
+    from tesserocr import PyTessBaseAPI, RIL, iterate_level
+    HAS_TESSEROCR = True
+except ImportError:
+    HAS_TESSEROCR = False
+
+try:
+    import uvloop
+    HAS_UVLOOP = True
+except ImportError:
+    HAS_UVLOOP = False
+
 # --- PDF Extraction Logic (from new_rag.py) ---
 
-def ocr_page(page: fitz.Page):
+# Pages are binarized before OCR, which Tesseract reads as well at 200 DPI
+# as it reads raw colour scans at 300.
+OCR_DPI = 200
+# Gaussian-weighted neighbourhood (px, odd) and offset for adaptive thresholding
+THRESH_BLOCK_SIZE = 31
+THRESH_C = 10
+# Binarized pages with less than this fraction of black pixels are blank
+BLANK_INK_RATIO = 0.005
+# Pages are binarized black-on-white, so Tesseract's retry of low-confidence
+# lines as inverted (white-on-black) text can never help; skip it.
+TESSERACT_VARIABLES = {"tessedit_do_invert": "0"}
+TESSERACT_CONFIG = " ".join(f"-c {name}={value}" for name, value in TESSERACT_VARIABLES.items())
+# Pages per Tesseract run when batching through pytesseract's list-file mode
+OCR_BATCH_SIZE = 16
+
+_OCR_FIELDS = ("text", "left", "top", "width", "height", "word_num")
+
+# One tesserocr engine per OCR thread (or Ray worker): the language
+# model is loaded once and stays resident for every page that thread OCRs.
+_tess_local = threading.local()
+
+
+def _get_tess_api():
+    api = getattr(_tess_local, "api", None)
+    if api is None:
+        api = _tess_local.api = PyTessBaseAPI(lang="eng")
+        for name, value in TESSERACT_VARIABLES.items():
+            api.SetVariable(name, value)
+    return api
+
+
+def _parse_tsv(tsv: str) -> Dict[str, np.ndarray]:
+    """
+    Parse tesseract's TSV output into typed columns.
+
+    Reading it with pandas gives one int/str array per column instead of
+    the per-cell Python objects pytesseract's Output.DICT builds.
+    """
+    df = pd.read_csv(io.StringIO(tsv), sep="\t", quoting=csv.QUOTE_NONE,
+                     keep_default_na=False, dtype={"text": str})
+    return {col: df[col].to_numpy() for col in _OCR_FIELDS + ("page_num",)}
+
+
+def _image_to_data(img: np.ndarray) -> Dict[str, Sequence]:
+    """
+    Word-level OCR data in pytesseract's Output.DICT layout for an 8-bit
+    single-channel image.
+
+    Uses the in-process tesserocr engine when it is installed, otherwise
+    falls back to pytesseract (one tesseract subprocess per call).
+    """
+    if not HAS_TESSEROCR:
+        # pytesseract would wrap an ndarray in a PIL image (another full
+        # copy) just to save it; write the PNG with OpenCV instead
+        return _images_to_data([img])[0]
+
+    api = _get_tess_api()
+    height, width = img.shape
+    api.SetImageBytes(img.tobytes(), width, height, 1, width)
+    api.Recognize()
+
+    data = {key: [] for key in _OCR_FIELDS}
+
+    def add(text, box, word_num):
+        x1, y1, x2, y2 = box
+        data["text"].append(text)
+        data["left"].append(x1)
+        data["top"].append(y1)
+        data["width"].append(x2 - x1)
+        data["height"].append(y2 - y1)
+        data["word_num"].append(word_num)
+
+    # pytesseract emits an empty row for the page and for every block,
+    # paragraph and line before their first word; ocr_page's line heuristic
+    # relies on those gaps, so reproduce them here.
+    add("", (0, 0, width, height), 0)
+    ri = api.GetIterator()
+    if ri is None:
+        return data
+
+    word_num = 0
+    for r in iterate_level(ri, RIL.WORD):
+        text = r.GetUTF8Text(RIL.WORD)
+        if text is None:
+            continue
+        if r.IsAtBeginningOf(RIL.BLOCK):
+            gaps = 3
+        elif r.IsAtBeginningOf(RIL.PARA):
+            gaps = 2
+        elif r.IsAtBeginningOf(RIL.TEXTLINE):
+            gaps = 1
+        else:
+            gaps = 0
+        if gaps:
+            word_num = 0
+            line_box = r.BoundingBox(RIL.TEXTLINE) or (0, 0, 0, 0)
+            for _ in range(gaps):
+                add("", line_box, 0)
+        word_num += 1
+        add(text, r.BoundingBox(RIL.WORD), word_num)
+    return data
+
+
+def _render_page(page: fitz.Page, dpi: int = OCR_DPI) -> np.ndarray:
+    """Rasterize a page into the binary image handed to Tesseract."""
+    # Render straight to 8-bit grayscale and view the samples in place:
+    # one byte per pixel and no intermediate PIL image.
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    gray = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+
+    # Adaptive threshold: evens out uneven scan lighting and hands Tesseract
+    # a clean binary image, so it skips its own cleanup.
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                   cv2.THRESH_BINARY, THRESH_BLOCK_SIZE, THRESH_C)
+    # gray is a view into the pixmap; drop both before the next page renders
+    del gray, pix
+    return binary
+
+
+def _images_to_data(images: Iterable[np.ndarray]) -> List[Dict[str, Sequence]]:
+    """
+    OCR several page images, returning one Output.DICT-style dict per image.
+
+    Without tesserocr every image_to_data call is a separate tesseract
+    process, so the batch is written out as PNGs and passed as a single
+    list file; tesseract then initializes once and tags each row with the
+    1-based page_num of the image it came from.
+
+    images is consumed one at a time, so passing a generator keeps only a
+    single page bitmap in memory.
+    """
+    if HAS_TESSEROCR:
+        return [_image_to_data(img) for img in images]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i, img in enumerate(images):
+            path = os.path.join(tmp, f"{i:04d}.png")
+            cv2.imwrite(path, img)
+            paths.append(path)
+            del img
+        if not paths:
+            return []
+        list_file = os.path.join(tmp, "pages.txt")
+        with open(list_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(paths) + "\n")
+        data = _parse_tsv(pytesseract.image_to_data(list_file, config=TESSERACT_CONFIG,
+                                                    output_type=pytesseract.Output.STRING))
+
+    # Rows are grouped by page, so each page is one contiguous slice
+    bounds = np.searchsorted(data["page_num"], np.arange(1, len(paths) + 2))
+    return [{key: values[start:end] for key, values in data.items()}
+            for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+@dataclass
+class OcrLines:
+    """
+    Word boxes of one page as parallel arrays (struct-of-arrays).
+
+    For OCR'd pages the geometry is in pixels; for pages read from the text
+    layer it is in PDF points, and height is the font size.
+    """
+    text: np.ndarray    # object array of str
+    x: np.ndarray
+    y: np.ndarray
+    width: np.ndarray
+    height: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def reading_order(self) -> "OcrLines":
+        """Return the words sorted top-to-bottom, then left-to-right."""
+        order = np.lexsort((self.x, self.y))
+        return OcrLines(self.text[order], self.x[order], self.y[order], self.width[order], self.height[order])
+
+    @classmethod
+    def empty(cls) -> "OcrLines":
+        return cls(*(np.empty(0, dtype=dtype) for dtype in (object, np.int32, np.int32, np.int32, np.int32)))
+
+
+# A heading span runs for at most this many OCR rows
+HEADING_SPAN_ROWS = 10
+
+
+@njit(cache=True)
+def _scan_heading_spans_jit(nonblank, empty, space):
+    """
+    Find the [start, end) word spans that make up the 'high' lines of a page.
+
+    A span starts at a non-blank word followed by two empty rows (the end
+    of a paragraph/block in Tesseract's layout) and runs for up to ten rows,
+    stopping early at a row that is a single space.
+    """
+    n = nonblank.shape[0]
+    spans = np.empty((n, 2), dtype=np.int64)
+    k = 0
+    for i in range(n - 2):
+        if nonblank[i] and empty[i + 1] and empty[i + 2]:
+            end = min(i + HEADING_SPAN_ROWS, n)
+            for j in range(i, end):
+                if space[j]:
+                    end = j
+                    break
+            spans[k, 0] = i
+            spans[k, 1] = end
+            k += 1
+    return spans[:k]
+
+
+def _scan_heading_spans_vectorized(nonblank, empty, space):
+    """
+    NumPy version of _scan_heading_spans_jit for when numba is missing.
+
+    Span starts come from a shift-and-compare of the masks; each end is the
+    nearer of the ten-row limit and the next single-space row, found with a
+    reversed running minimum over the space positions.
+    """
+    n = nonblank.shape[0]
+    if n < 3:
+        return np.empty((0, 2), dtype=np.int64)
+    starts = np.flatnonzero(nonblank[:-2] & empty[1:-1] & empty[2:])
+    rows = np.arange(n)
+    next_space = np.minimum.accumulate(np.where(space, rows, n)[::-1])[::-1]
+    ends = np.minimum(np.minimum(starts + HEADING_SPAN_ROWS, n), next_space[starts])
+    return np.column_stack((starts, ends)).astype(np.int64)
+
+
+# Without numba the explicit loop would run as plain Python
+_scan_heading_spans = _scan_heading_spans_jit if HAS_NUMBA else _scan_heading_spans_vectorized
+
+
+def _parse_ocr_data(data: Dict[str, Sequence]):
+    """
+    Turn word-level OCR data into (ocr_lines, high) for one page.
+    """
+    texts = data["text"]
+    arr = np.array(texts, dtype=str)
+    stripped = np.char.strip(arr)
+    nonblank = np.char.str_len(stripped) > 0
+
+    words = np.flatnonzero(nonblank)
+    ocr_lines = OcrLines(
+        text=stripped[words].astype(object),
+        x=np.asarray(data["left"], dtype=np.int32)[words],
+        y=np.asarray(data["top"], dtype=np.int32)[words],
+        width=np.asarray(data["width"], dtype=np.int32)[words],
+        height=np.asarray(data["height"], dtype=np.int32)[words],
+    )
+
+    spans = _scan_heading_spans(nonblank, arr == "", arr == " ")
+    high = [" ".join(texts[start:end]).strip() for start, end in spans]
+    return ocr_lines, _clean_high(high)
+
+
+def _clean_high(high: List[str]) -> List[str]:
+    """
+    Clean up 'high' list (reconstructed lines/headings): split into words,
+    collapse runs of repeated words and drop single characters.
+    """
+    words = np.array(" ".join(high).split(), dtype=str)
+    if not words.size:
+        return []
+    keep = np.append(words[:-1] != words[1:], True)
+    keep &= np.char.str_len(words) > 1
+    return words[keep].tolist()
+
+
+# Text-layer spans at least this much larger than the page's average font
+# size, or set in bold, are taken as headings.
+HEADING_SIZE_RATIO = 1.25
+# Scans often carry a few characters of real text (page numbers, stamps,
+# watermarks); below this many characters a page is still OCR'd.
+MIN_TEXT_LAYER_CHARS = 50
+
+
+def _text_layer_page(page: fitz.Page):
+    """
+    (ocr_lines, high) read from the page's own text layer, without OCR.
+
+    Returns None when the page has no usable text layer (a scanned page).
+    """
+    # Images are not needed and are expensive to decode; keep text only
+    blocks = page.get_text("dict", flags=fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES)["blocks"]
+    texts, boxes, sizes, bold = [], [], [], []
+    for blk in blocks:
+        if blk.get("type") != 0:
+            continue
+        for line in blk.get("lines", []):
+            for span in line.get("spans", []):
+                text = span["text"].strip()
+                if not text:
+                    continue
+                x0, _, x1, _ = span["bbox"]
+                texts.append(text)
+                boxes.append((x0, line["bbox"][1], x1 - x0))
+                sizes.append(span.get("size", 10))
+                bold.append(bool(span.get("flags", 0) & fitz.TEXT_FONT_BOLD))
+
+    if sum(map(len, texts)) < MIN_TEXT_LAYER_CHARS:
+        return None
+
+    boxes = np.array(boxes, dtype=np.float32)
+    lines = OcrLines(
+        text=np.array(texts, dtype=object),
+        x=boxes[:, 0],
+        y=boxes[:, 1],
+        width=boxes[:, 2],
+        height=np.array(sizes, dtype=np.float32),
+    )
+    is_heading = (lines.height >= lines.height.mean() * HEADING_SIZE_RATIO) | np.array(bold)
+    high = lines.text[is_heading].tolist()
+    return lines, _clean_high(high)
+
+
+def _is_blank(binary: np.ndarray) -> bool:
+    """True if a binarized page has (almost) no ink, e.g. a separator page."""
+    return np.count_nonzero(binary == 0) < BLANK_INK_RATIO * binary.size
+
+
+def _empty_page():
+    return OcrLines.empty(), []
+
+
+def ocr_page(page: fitz.Page, dpi: int = OCR_DPI):
     """
     Perform OCR on a PDF page using Tesseract.
+
+    Pages that carry a real text layer are read directly instead, and blank
+    pages are skipped.
     """
-    pix = page.get_pixmap(dpi=300)
-    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-    
-    # pytesseract.image_to_data returns detailed data including coordinates
-    data = pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT)
+    result = _text_layer_page(page)
+    if result is not None:
+        return result
+    binary = _render_page(page, dpi)
+    if _is_blank(binary):
+        return _empty_page()
+    return _parse_ocr_data(_image_to_data(binary))
 
-    ocr_lines = []
-    high = []
-    prob = ""
 
-    # Basic logic to reconstruct lines/words
-    for i, text in enumerate(data["text"]):
-        if text.strip():
-            try:
-                # heuristic: if next two are empty, might be end of a block/line
-                if (i + 2 < len(data["text"])) and data["text"][i+1]=="" and data["text"][i+2]=="":
-                    for j in range(10): # look ahead a bit
-                        if i+j < len(data["text"]) and data["text"][i+j] == ' ':
-                            break
-                        if i+j < len(data["text"]):
-                             prob += data["text"][i+j] + " "
-                
-                if prob != "":
-                    # Check if word number jumped (new line/block)
-                    if i > 0 and data["word_num"][i] > data["word_num"][i-1] + 1:
-                        pass # break logic in original, simplified here
-                    high.append(prob.strip())
-                
-                prob = ""
-            except Exception:
-                pass
-            
-            ocr_lines.append({
-                "text": text.strip(),
-                "x": data["left"][i],
-                "y": data["top"][i],
-                "width": data["width"][i],
-                "height": data["height"][i]
-            })
-
-    # Clean up 'high' list (reconstructed lines/headings)
-    new_hight = [i for h in high for i in h.split()]
-    no_dup = []
-    for i in range(len(new_hight)):
-        try:
-            if i+1 < len(new_hight) and new_hight[i] == new_hight[i+1]:
-                continue
-            else:
-                no_dup.append(new_hight[i])
-        except Exception:
-            pass
-    
-    return ocr_lines, [i for i in no_dup if len(i) > 1]
+def _prepare_page(page: fitz.Page):
+    """
+    Everything page-level that needs PyMuPDF, ahead of Tesseract.
+
+    Returns (result, None) for pages that need no OCR (text layer or
+    blank), otherwise (None, binary image to OCR).
+    """
+    result = _text_layer_page(page)
+    if result is not None:
+        return result, None
+    binary = _render_page(page)
+    if _is_blank(binary):
+        return _empty_page(), None
+    return None, binary
+
+
+def ocr_pages(pages: Iterable[fitz.Page]):
+    """
+    Perform OCR on several PDF pages with a single Tesseract run.
+
+    Pages with a real text layer skip Tesseract entirely, as do blank
+    pages; only the remaining scanned ones are batched. pages is consumed
+    lazily, one page at a time. Returns one (ocr_lines, high) tuple per
+    page, in order.
+    """
+    results = []
+    inked = []
+
+    def images():
+        for page in pages:
+            result, binary = _prepare_page(page)
+            if binary is not None:
+                inked.append(len(results))
+                yield binary
+            results.append(result)
+
+    # _images_to_data drains the generator before returning, so inked is
+    # complete by the time it is zipped with the data
+    data = _images_to_data(images())
+    for i, page_data in zip(inked, data):
+        results[i] = _parse_ocr_data(page_data)
+    return results
 
 
 def looks_like_heading(text: str) -> bool:
     """Heuristic to check if text looks like a heading."""
-    if len(text) < 3: return False
-    if text.isdigit(): return False
-    if text.istitle() or text.isupper():
-        return True
-    return False
+    # istitle/isupper need at least one cased character, so pure digit
+    # strings already fail here without a separate isdigit scan.
+    return len(text) >= 3 and (text.istitle() or text.isupper())
+
+
+def heading_mask(texts: List[str]) -> np.ndarray:
+    """
+    Vectorized looks_like_heading: one boolean per entry of texts.
+    """
+    arr = np.asarray(texts, dtype=str)
+    return (np.strings.str_len(arr) >= 3) & (np.strings.istitle(arr) | np.strings.isupper(arr))
+
+
+# Weighted edit distance below which two OCR'd headings are the same topic.
+# Common OCR confusions (0/O, 1/l, ...) cost 0.1-0.3, any other edit 1.0.
+HEADING_MERGE_THRESHOLD = 0.3
+
+
+def _merge_similar_headings(topic_pages: Dict[str, set]) -> Dict[str, set]:
+    """
+    Fold headings that differ only by OCR misreads ("Module 5" / "Modu1e 5")
+    into the first spelling seen. Needs ocr_stringdist; without it the
+    topics are returned unchanged.
+    """
+    if not HAS_OCR_STRINGDIST or len(topic_pages) < 2:
+        return topic_pages
+
+    wl = WeightedLevenshtein()
+    merged: Dict[str, set] = {}
+    for topic, pages in topic_pages.items():
+        if merged:
+            canonical = list(merged)
+            distances = wl.batch_distance(topic, canonical)
+            best = min(range(len(canonical)), key=distances.__getitem__)
+            if distances[best] < HEADING_MERGE_THRESHOLD:
+                merged[canonical[best]] |= pages
+                continue
+        merged[topic] = set(pages)
+    return merged
+
+
+def _ocr_batch(doc: fitz.Document, page_indices: List[int]):
+    """
+    OCR a batch of consecutive pages of an open document.
+
+    Returns a list of (page_num, high) with 1-based page numbers; high is
+    None for every page of a batch whose OCR failed.
+    """
+    page_nums = [i + 1 for i in page_indices]
+    try:
+        # Batches are consecutive, so stream them with the page iterator
+        results = ocr_pages(doc.pages(page_indices[0], page_indices[-1] + 1))
+    except Exception as e:
+        logger.error(f"OCR failed for pages {page_nums[0]}-{page_nums[-1]}: {e}")
+        return [(page_num, None) for page_num in page_nums]
+    finally:
+        # MuPDF keeps decoded fonts/images of every page it has loaded in a
+        # global store; empty it so a worker's memory stays at one batch.
+        fitz.TOOLS.store_shrink(100)
+    return [(page_num, high) for page_num, (_, high) in zip(page_nums, results)]
 
 
-def extract_topics_scanned(pdf_path: str) -> Dict[str, List[int]]:
+def _render_batch(doc: fitz.Document, page_indices: List[int]):
+    """
+    Run _prepare_page over a batch of consecutive pages.
+
+    PyMuPDF is not thread-safe, so this always runs on the thread that owns
+    the document; only the returned images go to OCR threads.
+    """
+    try:
+        return [_prepare_page(page) for page in doc.pages(page_indices[0], page_indices[-1] + 1)]
+    finally:
+        fitz.TOOLS.store_shrink(100)
+
+
+def _ocr_rendered_batch(page_nums: List[int], prepared: Optional[list]):
+    """
+    OCR the images of a batch prepared by _render_batch (in a worker thread).
+
+    Returns a list of (page_num, high); high is None for every page of a
+    batch that failed to render or OCR.
+    """
+    if prepared is None:
+        return [(page_num, None) for page_num in page_nums]
+    results = [result for result, _ in prepared]
+    inked = [i for i, (_, binary) in enumerate(prepared) if binary is not None]
+    try:
+        data = _images_to_data(prepared[i][1] for i in inked)
+        for i, page_data in zip(inked, data):
+            results[i] = _parse_ocr_data(page_data)
+    except Exception as e:
+        logger.error(f"OCR failed for pages {page_nums[0]}-{page_nums[-1]}: {e}")
+        return [(page_num, None) for page_num in page_nums]
+    return [(page_num, high) for page_num, (_, high) in zip(page_nums, results)]
+
+
+def _plan_batches(n_pages: int, workers: int) -> List[List[int]]:
+    """
+    Split page indices into consecutive batches of up to OCR_BATCH_SIZE,
+    shrinking them for short documents so every worker still gets one.
+    """
+    batch_size = max(1, min(OCR_BATCH_SIZE, -(-n_pages // max(workers, 1))))
+    return [list(range(start, min(start + batch_size, n_pages)))
+            for start in range(0, n_pages, batch_size)]
+
+
+def _collect_topics(batches: Iterable[list]) -> Dict[str, List[int]]:
+    """
+    Run the heading pass over per-batch OCR results given in page order.
+    """
+    # Sets: a topic is re-seen on most pages it spans, and the continuation
+    # page of one page is the heading page of the next.
+    topic_pages = defaultdict(set)
+    current_topic = None
+
+    for batch in batches:
+        for page_num, high in batch:
+            if high is None:
+                continue
+
+            if high:
+                headings = np.asarray(high)[heading_mask(high)].tolist()
+                for txt in headings:
+                    topic_pages[txt].add(page_num)
+                if headings:
+                    current_topic = headings[-1]
+
+            if current_topic is not None:
+                # Add next page as continuation (heuristic)
+                topic_pages[current_topic].add(page_num + 1)
+
+    topic_pages = _merge_similar_headings(topic_pages)
+    return {topic: sorted(pages) for topic, pages in topic_pages.items()}
+
+
+def extract_topics_scanned(pdf_path: str, max_workers: Optional[int] = None) -> Dict[str, List[int]]:
     """
     Extract topics and their page ranges from a scanned PDF.
     Uses OCR if text layer is missing.
+
+    Pages are rendered on the calling thread and OCR'd in parallel on a
+    thread pool (Tesseract runs outside the GIL), in batches of up to
+    OCR_BATCH_SIZE pages per Tesseract run; the heading pass that tracks
+    the current topic depends on page order and stays sequential. With a
+    single worker the whole document goes through one Tesseract run
+    instead.
     """
-    doc = fitz.open(pdf_path)
-    topic_ranges = {}
-    current_topic = None
+    with fitz.open(pdf_path) as doc:
+        n_pages = len(doc)
+        if not n_pages:
+            return {}
 
-    for page_num, page in enumerate(doc, start=1):
-        # raw = page.get_text("dict")["blocks"]
-        # In this implementation, we force OCR/checking or use the hybrid approach
-        # For now, sticking to the provided new_rag.py logic which used OCR heavily
-        
+        workers = min(max_workers or os.cpu_count() or 1, n_pages)
+        if workers == 1:
+            # No pool to feed: one list-file invocation amortizes the
+            # Tesseract start-up over every page and spawns no processes.
+            return _collect_topics([_ocr_batch(doc, list(range(n_pages)))])
+
+        batches = _plan_batches(n_pages, workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor, \
+                tqdm(total=n_pages, desc="OCR pages") as pbar:
+
+            def ocr_batches():
+                # Render on this thread, OCR on the pool. Rendering stays at
+                # most one batch per worker ahead, which bounds the images
+                # held in memory; results are yielded in page order.
+                in_flight = deque()
+                for batch in batches:
+                    page_nums = [i + 1 for i in batch]
+                    try:
+                        prepared = _render_batch(doc, batch)
+                    except Exception as e:
+                        logger.error(f"Rendering failed for pages {page_nums[0]}-{page_nums[-1]}: {e}")
+                        prepared = None
+                    in_flight.append(executor.submit(_ocr_rendered_batch, page_nums, prepared))
+                    if len(in_flight) > workers:
+                        yield in_flight.popleft().result()
+                while in_flight:
+                    yield in_flight.popleft().result()
+
+            def progress(results):
+                for batch in results:
+                    pbar.update(len(batch))
+                    yield batch
+
+            return _collect_topics(progress(ocr_batches()))
+
+
+if HAS_RAY:
+    @ray.remote(num_cpus=1)
+    def _ocr_batch_task(pdf_path: str, page_indices: List[int]):
+        """Ray task: OCR one batch of pages of a PDF on any node of the cluster."""
+        # Workers on other nodes do not inherit the driver's environment
+        os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+        with fitz.open(pdf_path) as doc:
+            return _ocr_batch(doc, page_indices)
+
+
+def extract_topics_scanned_many(pdf_paths: List[str]) -> Dict[str, Any]:
+    """
+    Extract topics from several PDFs with one Ray job.
+
+    Every page batch of every PDF is submitted up front, so the cluster
+    stays busy across document boundaries. Returns, per path, either the
+    topic map or the exception that PDF failed with. The paths must be
+    readable from every Ray node.
+
+    Without Ray the PDFs are processed one after another with
+    extract_topics_scanned.
+    """
+    if not HAS_RAY:
+        results = {}
+        for pdf_path in pdf_paths:
+            try:
+                results[pdf_path] = extract_topics_scanned(pdf_path)
+            except Exception as e:
+                results[pdf_path] = e
+        return results
+
+    if not ray.is_initialized():
+        ray.init(ignore_reinit_error=True)
+    workers = int(ray.cluster_resources().get("CPU", 1))
+
+    pending = {}
+    for pdf_path in pdf_paths:
         try:
-            lines, high = ocr_page(page)
+            with fitz.open(pdf_path) as doc:
+                n_pages = len(doc)
         except Exception as e:
-            logger.error(f"OCR failed for page {page_num}: {e}")
+            pending[pdf_path] = e
             continue
+        pending[pdf_path] = [_ocr_batch_task.remote(pdf_path, batch)
+                             for batch in _plan_batches(n_pages, workers)]
+
+    results = {}
+    for pdf_path, refs in pending.items():
+        if isinstance(refs, Exception):
+            results[pdf_path] = refs
+            continue
+        try:
+            results[pdf_path] = _collect_topics(ray.get(refs))
+        except Exception as e:
+            results[pdf_path] = e
+    return results
+
+# Topic maps of already-ingested PDFs, keyed by the file's content hash
+TOPICS_CACHE_DIR = Path("data/cache/ocr")
+# Bump when OCR settings or the heading heuristics change so stale topic
+# maps are not served from the cache.
+TOPICS_CACHE_VERSION = 1
+
+
+def _topics_cache_file(pdf_path: str, cache_dir: Path = TOPICS_CACHE_DIR) -> Path:
+    return cache_dir / f"{pdf_cache.file_digest(pdf_path)}-v{TOPICS_CACHE_VERSION}.json"
 
-        for line in high:
-            txt = line
-            if looks_like_heading(txt):
-                current_topic = txt
-                if current_topic not in topic_ranges:
-                    topic_ranges[current_topic] = []
-                topic_ranges[current_topic].append(page_num)
-        
-        if current_topic in topic_ranges:
-            # Add next page as continuation (heuristic)
-            topic_ranges[current_topic].append(page_num + 1)
-            
-    return topic_ranges
+
+def _load_cached_topics(cache_file: Path) -> Optional[Dict[str, List[int]]]:
+    if not cache_file.exists():
+        return None
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            topics_map = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable OCR cache {cache_file}: {e}")
+        return None
+    logger.info(f"OCR cache hit: {cache_file.name}")
+    return topics_map
+
+
+def _store_cached_topics(cache_file: Path, topics_map: Dict[str, List[int]]) -> None:
+    """Write the topic map atomically, so readers never see a partial file."""
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(topics_map, f, ensure_ascii=False)
+            os.replace(tmp_path, cache_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        logger.warning(f"Failed to write OCR cache: {e}")
 
 # --- Helper Functions (Moved from utils.py) ---
 
-def create_main_chain(fpath):
-    # 1. Load and Split Document
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+# Below this many chunks a flat scan is already fast; from here on queries
+# first scan 1-bit codes (one sign bit per dimension, 32x smaller than
+# float32) by Hamming distance and rerank only the best candidates.
+BINARY_MIN_CHUNKS = 1000
+RERANK_FACTOR = 32        # candidates reranked per requested result (k=4 -> 128)
+# From here there are enough vectors to train product-quantizer codebooks
+# (2**PQ_NBITS centroids per sub-space want ~40 points each).
+IVFPQ_MIN_CHUNKS = 10000
+PQ_M = 8                  # sub-quantizers; each vector is stored in PQ_M bytes
+PQ_NBITS = 8
+IVF_NPROBE = 8            # inverted lists scanned per query
 
-    # Assuming 'fpath' txt file is in the same directory as this script
-    # Or provide the full path if it's elsewhere
+
+def _build_faiss_index(vectors: np.ndarray) -> "faiss.Index":
+    """
+    Pick, train and fill a FAISS index for the chunk embeddings. Vectors
+    are expected L2-normalized, so inner product is cosine similarity.
+
+    Vectors are never stored as float32: small corpora use 8-bit scalar
+    quantization, mid-sized ones a binary prefilter with float16 rerank,
+    and large ones IVF-PQ at PQ_M bytes per vector.
+    """
+    n, dim = vectors.shape
+    if n >= IVFPQ_MIN_CHUNKS and dim % PQ_M == 0:
+        # ~4*sqrt(N) lists, capped so k-means gets its 39 points per centroid
+        nlist = min(int(4 * np.sqrt(n)), n // 39)
+        quantizer = faiss.IndexFlatIP(dim)
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, PQ_M, PQ_NBITS, faiss.METRIC_INNER_PRODUCT)
+        index.nprobe = IVF_NPROBE
+    elif n >= BINARY_MIN_CHUNKS:
+        # Sign bits against per-dimension median thresholds (learned in
+        # train), so the codes stay informative for off-centre embeddings
+        prefilter = faiss.IndexLSH(dim, dim, False, True)
+        # IndexRefine only reads candidate ids from the base index, but
+        # insists both indexes declare the same metric
+        prefilter.metric_type = faiss.METRIC_INNER_PRODUCT
+        rerank = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+        index = faiss.IndexRefine(prefilter, rerank)
+        index.k_factor = RERANK_FACTOR
+    else:
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+    # SQ training only records per-dimension ranges; IVF-PQ runs k-means
+    index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+# Minimum cosine similarity between question and chunk to keep the chunk
+RETRIEVAL_SIMILARITY_THRESHOLD = 0.76
+
+def _run_async(coro):
+    """asyncio.run, on uvloop's faster event loop where it is installed."""
+    if HAS_UVLOOP:
+        return uvloop.run(coro)
+    return asyncio.run(coro)
+
+
+# Texts per embedding request; larger inputs are split and sent concurrently
+EMBED_BATCH_SIZE = 100
+# Embedding requests in flight at once, to stay under the API rate limit
+EMBED_CONCURRENCY = 8
+
+
+async def _aembed_batched(embeddings, texts: List[str], batch_size: int = EMBED_BATCH_SIZE) -> List[List[float]]:
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    sem = asyncio.Semaphore(EMBED_CONCURRENCY)
+
+    async def embed(batch):
+        async with sem:
+            return await embeddings.aembed_documents(batch)
+
+    results = await asyncio.gather(*(embed(batch) for batch in batches))
+    return [vector for batch in results for vector in batch]
+
+
+def embed_documents_concurrently(embeddings, texts: List[str]) -> List[List[float]]:
+    """
+    Embed texts with up to EMBED_BATCH_SIZE per request and up to
+    EMBED_CONCURRENCY requests in flight, so a long transcript costs a few
+    round-trips instead of one per batch.
+    """
+    if len(texts) <= EMBED_BATCH_SIZE:
+        return embeddings.embed_documents(texts)
     try:
-        file_path = fpath # Adjust path if necessary
-        with open(file_path, "r", encoding="utf-8") as file:
-            transcript = file.read()
-    except FileNotFoundError:
-        print(f"Error: The file '{file_path}' was not found.")
-        return None # Return None instead of exit for better error handling
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return _run_async(_aembed_batched(embeddings, texts))
+    # Called from inside an event loop: can't block on a nested one
+    return embeddings.embed_documents(texts)
 
-    chunks = splitter.create_documents([transcript])
-    print(f"Number of chunks created: {len(chunks)}")
 
-    # 2. Initialize Embeddings and Vector Store with Google Generative AI
+def build_vector_store(chunks, embeddings) -> FAISS:
+    """
+    FAISS.from_documents with the index type chosen by corpus size.
+
+    Retrieval is by cosine similarity, which is what both embedding models
+    are trained for: chunk vectors are normalized here and searched by
+    inner product. The query's own norm scales every score equally, so it
+    does not change the top-k.
+    """
+    texts = [chunk.page_content for chunk in chunks]
+    vectors = np.asarray(embed_documents_concurrently(embeddings, texts), dtype=np.float32)
+    faiss.normalize_L2(vectors)
+    index = _build_faiss_index(vectors)
+    ids = [str(uuid.uuid4()) for _ in chunks]
+    docstore = InMemoryDocstore(dict(zip(ids, chunks)))
+    return FAISS(embeddings, index, docstore, dict(enumerate(ids)),
+                 distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT)
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that memoizes embed_query.
+
+    Every retrieval embeds the question first; repeated questions (the same
+    query against several videos, or re-asked in a session) are answered
+    from the cache instead of another API call or model forward pass.
+    Document embedding is passed straight through.
+    """
+    def __init__(self, inner: Embeddings, maxsize: int = 1024, model_name: str = ""):
+        self.inner = inner
+        # Identifies the vector space, e.g. for keying persisted indexes
+        self.model_name = model_name
+        # Tuples so callers can't mutate a cached vector in place
+        self._embed_query = lru_cache(maxsize=maxsize)(lambda text: tuple(inner.embed_query(text)))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.inner.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return list(self._embed_query(text))
+
+
+# Chunk embeddings already computed, one file per (model, chunk text) hash
+EMBEDDINGS_CACHE_DIR = Path("data/cache/embeddings")
+
+
+@lru_cache(maxsize=1)
+def get_embeddings() -> CachedQueryEmbeddings:
+    """
+    Shared embedding model for every RAG chain (created on first use), so
+    the model is loaded once and the query cache spans chains.
+
+    Document embeddings are also cached on disk, so re-indexing a
+    transcript (or any chunk seen before) makes no embedding calls.
+    """
     # Note: Requires google-generativeai to be installed or compatible shim
     try:
-        embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+        model_name = "models/embedding-001"
+        embeddings = GoogleGenerativeAIEmbeddings(model=model_name)
     except Exception as e:
         logger.warning(f"Google Generative AI Embeddings not available: {e}. Falling back to HuggingFace embeddings.")
         # Choose one of the recommended models
+        model_name = "BAAI/bge-small-en-v1.5"  # Or "sentence-transformers/all-mpnet-base-v2"
         embeddings = HuggingFaceEmbeddings(
-            model_name="BAAI/bge-small-en-v1.5"  # Or "sentence-transformers/all-mpnet-base-v2"
+            model_name=model_name,
             # Optional parameters:
             # model_kwargs={"device": "cpu"},  # Use "cuda" if GPU is available for faster computation
-            # encode_kwargs={"normalize_embeddings": True}
+            encode_kwargs={"normalize_embeddings": True},
         )
-    vector_store = FAISS.from_documents(chunks, embeddings)
+    embeddings = CacheBackedEmbeddings.from_bytes_store(
+        embeddings,
+        LocalFileStore(EMBEDDINGS_CACHE_DIR),
+        namespace=model_name,
+        key_encoder="blake2b",
+    )
+    return CachedQueryEmbeddings(embeddings, model_name=model_name)
+
+
+@lru_cache(maxsize=None)
+def get_chat_model(temperature: float) -> ChatGoogleGenerativeAI:
+    """
+    Shared Gemini client per temperature, so every chain and video helper
+    reuses one configured client (and its HTTP connections) instead of
+    building a new one per call.
+    """
+    return ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=temperature)
+
+
+# Transcript chunking, in characters
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+# Every code point for which str.isspace() is true (what \s matches)
+_WHITESPACE_CODEPOINTS = np.array([ord(c) for c in (
+    "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680"
+    "\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a"
+    "\u2028\u2029\u202f\u205f\u3000"
+)], dtype=np.uint32)
+
+
+def split_transcript(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> List[Document]:
+    """
+    Split text into word-aligned chunks of at most chunk_size characters,
+    each starting about chunk_overlap characters before the previous end.
+
+    Word boundaries are found for the whole text at once on its UTF-32 code
+    points; chunk edges are then picked by binary search over them instead
+    of re-measuring candidate pieces. A single word longer than chunk_size
+    is cut mid-word.
+    """
+    n = len(text)
+    codepoints = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    space = np.isin(codepoints, _WHITESPACE_CODEPOINTS)
+    flips = np.flatnonzero(space[1:] != space[:-1]) + 1
+    # Where a chunk may end (start of a whitespace run) or begin (end of one)
+    ends = flips[space[flips]]
+    starts = flips[~space[flips]]
+
+    chunks = []
+    start = 0
+    while start < n:
+        limit = start + chunk_size
+        if limit >= n:
+            end = n
+        else:
+            i = np.searchsorted(ends, limit, side="right") - 1
+            end = int(ends[i]) if i >= 0 and ends[i] > start else limit
+        piece = text[start:end].strip()
+        if piece:
+            chunks.append(Document(page_content=piece))
+        if end >= n:
+            break
+        # Back up by the overlap to the nearest word start, but always move on
+        j = np.searchsorted(starts, end - chunk_overlap, side="left")
+        if j < len(starts) and starts[j] <= start:
+            j = np.searchsorted(starts, start, side="right")
+        start = int(starts[j]) if j < len(starts) and starts[j] < end else end
+    return chunks
+
+
+# Built transcript indexes, keyed by a hash of the embedding model and the
+# transcript text. Bump the version when chunking or index layout changes.
+FAISS_CACHE_DIR = Path("data/cache/faiss")
+FAISS_CACHE_VERSION = 2
+
+
+def load_or_build_vector_store(transcript: str, embeddings: CachedQueryEmbeddings) -> FAISS:
+    """
+    Return the FAISS store for a transcript, building and saving it only on
+    a cache miss. A hit skips splitting, embedding and index training.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{embeddings.model_name}\0v{FAISS_CACHE_VERSION}\0".encode())
+    h.update(transcript.encode())
+    cache_path = FAISS_CACHE_DIR / h.hexdigest()
+
+    if cache_path.is_dir():
+        try:
+            # Only ever reads pickles this module wrote itself
+            vector_store = FAISS.load_local(str(cache_path), embeddings, allow_dangerous_deserialization=True)
+            logger.info(f"FAISS cache hit: {cache_path.name}")
+            return vector_store
+        except Exception as e:
+            logger.warning(f"Rebuilding unreadable FAISS cache {cache_path}: {e}", exc_info=True)
+            # os.replace below cannot overwrite a non-empty directory
+            shutil.rmtree(cache_path, ignore_errors=True)
+
+    chunks = split_transcript(transcript)
+    print(f"Number of chunks created: {len(chunks)}")
+    vector_store = build_vector_store(chunks, embeddings)
+
+    # Save into a scratch directory and rename it into place, so a reader
+    # never sees an index without its docstore
+    try:
+        FAISS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=FAISS_CACHE_DIR, suffix=".tmp")
+        try:
+            vector_store.save_local(tmp_dir)
+            os.replace(tmp_dir, cache_path)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+    except OSError as e:
+        logger.warning(f"Failed to write FAISS cache: {e}")
+    return vector_store
+
+
+@lru_cache(maxsize=32)
+def _read_transcript_cached(path: str, mtime_ns: int) -> str:
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def read_transcript(path: str) -> str:
+    """
+    Read a transcript file, reusing the text while the file is unchanged.
+
+    ask_youtube, the quiz generator and the structure analysis often run
+    on the same video back to back; keying on mtime keeps a rewritten file
+    from being served stale.
+    """
+    return _read_transcript_cached(path, os.stat(path).st_mtime_ns)
+
+
+def create_main_chain(fpath):
+    # 1. Load Document (split into chunks only when its index is not cached)
+    # Assuming 'fpath' txt file is in the same directory as this script
+    # Or provide the full path if it's elsewhere
+    try:
+        file_path = fpath # Adjust path if necessary
+        transcript = read_transcript(file_path)
+    except FileNotFoundError:
+        print(f"Error: The file '{file_path}' was not found.")
+        return None # Return None instead of exit for better error handling
+
+    # 2. Initialize Embeddings and Vector Store with Google Generative AI
+    embeddings = get_embeddings()
+    vector_store = load_or_build_vector_store(transcript, embeddings)
     base_retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 4})
 
     # 3. Initialize Chat Model with Gemini 2.5 Flash
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=1.0)
+    llm = get_chat_model(1.0)
 
     # --- Context Window Optimization Implementation ---
     # 4. Create a compressor for the retrieved documents
-    # We'll use the same LLM for compression, but you could use a smaller, faster one if needed.
-    compressor = LLMChainExtractor.from_llm(llm)
+    # Drops near-duplicate chunks (neighbours share chunk_overlap text),
+    # then chunks not similar enough to the question. Both stages reuse
+    # one embedding call per query, where an LLM extractor made one
+    # Gemini call per retrieved chunk before the answer could even start.
+    compressor = DocumentCompressorPipeline(transformers=[
+        EmbeddingsRedundantFilter(embeddings=embeddings),
+        EmbeddingsFilter(embeddings=embeddings, similarity_threshold=RETRIEVAL_SIMILARITY_THRESHOLD),
+    ])
 
     # 5. Create a ContextualCompressionRetriever
     # This retriever will first get the documents using base_retriever,
@@ -223,14 +1140,36 @@ def create_main_chain(fpath):
         return context_text
 
     # 8. Construct the RAG Chain using the compressed_retriever
-    parallel_chain = RunnableParallel({
-        'context': compressed_retriever | RunnableLambda(format_docs), # Use compressed_retriever here
-        'question': RunnablePassthrough()
-    })
+    # Only the retriever branch does work, so one lambda builds the prompt
+    # inputs directly instead of fanning out through a RunnableParallel.
+    def build_inputs(question):
+        return {'context': format_docs(compressed_retriever.invoke(question)), 'question': question}
+
+    async def abuild_inputs(question):
+        docs = await compressed_retriever.ainvoke(question)
+        return {'context': format_docs(docs), 'question': question}
+
     parser = StrOutputParser()
-    main_chain = parallel_chain | prompt | llm | parser
+    main_chain = RunnableLambda(build_inputs, afunc=abuild_inputs) | prompt | llm | parser
     return main_chain
 
+
+@lru_cache(maxsize=16)
+def _cached_main_chain(fpath: str, mtime_ns: int):
+    return create_main_chain(fpath)
+
+
+def get_main_chain(fpath: str):
+    """
+    create_main_chain, memoized per transcript file while it is unchanged,
+    so follow-up questions about a video reuse the built chain.
+    """
+    try:
+        mtime_ns = os.stat(fpath).st_mtime_ns
+    except FileNotFoundError:
+        return create_main_chain(fpath)
+    return _cached_main_chain(fpath, mtime_ns)
+
 def post_load_json(jfile):
     """
     Converts a JSON subtitle file to a text file.
@@ -239,8 +1178,8 @@ def post_load_json(jfile):
         print(f"Error: JSON file {jfile} not found.")
         return None
         
-    with open(jfile,"r", encoding='utf-8') as JSON:
-        jdata=json.load(JSON)
+    with open(jfile, "rb") as JSON:
+        jdata=orjson.loads(JSON.read())
         
         events = []
         if isinstance(jdata, dict) and 'events' in jdata:
@@ -251,89 +1190,111 @@ def post_load_json(jfile):
             
         output_txt = f'{Path(jfile).stem}.txt'
         
-        # Clear existing file
-        with open(output_txt, "w", encoding="utf-8") as f:
-            f.write("")
-            
-        text_accumulator = ""
-        
-        if events:
-            # Existing logic for 'events' structure
-            for event in events[1:]:
-                if 'segs' in event and len(event['segs']) > 0:
-                    for seg in event['segs']:
-                        if 'utf8' in seg:
-                            text_accumulator += seg['utf8']
-                    text_accumulator += " "
-        else:
+        if not events:
              print("Warning: 'events' key not found in JSON. Check format.")
              return None
 
-        with open(output_txt, "a", encoding="utf-8") as file:
-            file.write(text_accumulator)
+        parts = []
+        for event in events[1:]:
+            if 'segs' in event and len(event['segs']) > 0:
+                for seg in event['segs']:
+                    if 'utf8' in seg:
+                        parts.append(seg['utf8'])
+                parts.append(" ")
+
+        with open(output_txt, "w", encoding="utf-8") as file:
+            file.write("".join(parts))
             
     return output_txt
 
 # --- YouTube Search Logic ---
 
+# Transcripts of already-fetched videos, keyed by a hash of the URL, so
+# repeated questions about one video skip the browser entirely.
+CAPTIONS_CACHE_DIR = Path("data/cache/captions")
+
+
+# Anything that is not a word character is dropped from saved subtitle names
+_UNSAFE_TITLE_CHARS = re.compile(r"\W")
+
+
+def _captions_cache_file(url: str, cache_dir: Path = CAPTIONS_CACHE_DIR) -> Path:
+    return cache_dir / f"{hashlib.blake2b(url.encode(), digest_size=16).hexdigest()}.txt"
+
+
 class YouTubeSearcher:
     """
     Helper to search YouTube for educational content using DrissionPage.
     """
     def __init__(self):
+        # The browser is started on first use and reused by later searches
+        # until close()
         self.page = None
-        # if HAS_DRISSION:
-        #     # Initialize lazily or on demand
-        #     pass
+
+    def _get_page(self):
+        """Return the shared browser page, launching Chromium if needed."""
+        if self.page is None:
+            self.page = ChromiumPage()
+        return self.page
+
+    def close(self):
+        """Quit the browser, if one was started."""
+        if self.page is not None:
+            try:
+                self.page.quit()
+            except Exception as e:
+                logger.warning(f"Failed to close browser: {e}")
+            self.page = None
 
     def _wait_for_subs(self, page, timeout=10) -> Optional[str]:
         """
         Internal method to listen for subtitle API responses.
+
+        Blocks on the listener until a packet arrives; each attempt gives up
+        after `timeout` seconds without one.
         """
         print("Waiting for network requests...")
-        time.sleep(timeout) # Wait for video to load and subs to fetch
-        found=False
         
-        # Filter and display subtitle API responses
         max_retries = 3
         retries = 0
         
-        while not found and retries < max_retries:
-            print("!! Click 'CC' button manually to extract subtitles (if running interactively)")
-            for step in page.listen.steps():
-                if hasattr(step, 'response') and step.response:
-                    url = step.response.url
-                    try:
-                        content_type = step.response.headers.get('Content-Type', '')
-                    except:
-                        continue
-                        
-                    if 'api' in url.lower() and 'timedtext' in url.lower() and 'json' in content_type:
-                        print(f"API URL: {url}")
-                        try:
-                            body = step.response.body
-                            json_string = json.dumps(body, indent=2, ensure_ascii=False)
-                            tit = page.title.replace(" ","_")
-                            # Sanitize filename
-                            tit = "".join([c for c in tit if c.isalpha() or c.isdigit() or c=='_']).rstrip()
-                            filename = f"{tit}.json"
-                            
-                            with open(filename, 'w', encoding='utf-8') as f:
-                                f.write(json_string)
-
-                            print(f"✅ JSON saved to {filename}")
-                            page.stop_loading()
-                            return filename
-                        except Exception as e:
-                            print("❌ Failed to save JSON:", e)
-                        
-                        found = True
-                        break
-            
-            if not found:
+        print("!! Click 'CC' button manually to extract subtitles (if running interactively)")
+        while retries < max_retries:
+            packet = page.listen.wait(timeout=timeout)
+            if not packet:
                 print("No subtitle API response found yet, retrying...")
-                time.sleep(5)
                 retries += 1
+                print("!! Click 'CC' button manually to extract subtitles (if running interactively)")
+                continue
+            if not getattr(packet, 'response', None):
+                continue
+
+            url = packet.response.url
+            try:
+                content_type = packet.response.headers.get('Content-Type', '')
+            except Exception:
+                continue
+            if not ('api' in url.lower() and 'timedtext' in url.lower() and 'json' in content_type):
+                continue
+
+            print(f"API URL: {url}")
+            try:
+                body = packet.response.body
+                # Compact UTF-8; nobody reads this file, post_load_json does
+                json_bytes = orjson.dumps(body, option=orjson.OPT_NON_STR_KEYS)
+                # Sanitize filename
+                tit = _UNSAFE_TITLE_CHARS.sub("", page.title.replace(" ", "_"))
+                filename = f"{tit}.json"
+                
+                with open(filename, 'wb') as f:
+                    f.write(json_bytes)
+
+                print(f"✅ JSON saved to {filename}")
+                page.stop_loading()
+                return filename
+            except Exception as e:
+                print("❌ Failed to save JSON:", e)
+                return None
                 
         return None
 
@@ -351,9 +1312,9 @@ class YouTubeSearcher:
         
         if HAS_DRISSION:
             try:
-                self.page = ChromiumPage()
+                page = self._get_page()
                 # 1. Search
-                self.page.get(f"https://www.youtube.com/results?search_query={encoded_query}")
+                page.get(f"https://www.youtube.com/results?search_query={encoded_query}")
                 single_line_viz("Searching video...")
                 
                 # Mock selection logic: pick the first video that isn't an ad (simplified)
@@ -382,13 +1343,10 @@ class YouTubeSearcher:
                     "url": f"https://www.youtube.com/results?search_query={encoded_query}",
                     "subtitles": "Search performed. Please select a video URL and use 'ask-youtube <URL>'."
                 })
-                
-                self.page.quit()
 
             except Exception as e:
                 logger.error(f"YouTube search failed: {e}")
-                if self.page:
-                    self.page.quit()
+                self.close()
         else:
             logger.warning("DrissionPage not installed. Returning empty results.")
             
@@ -399,29 +1357,41 @@ class YouTubeSearcher:
         Fetches captions for a specific YouTube URL.
         Returns the path to the converted text file.
         """
+        cache_file = _captions_cache_file(url)
+        if cache_file.exists():
+            logger.info(f"Captions cache hit for {url}")
+            return str(cache_file)
+
         if not HAS_DRISSION:
             print("DrissionPage not installed.")
             return None
             
         json_path = None
         try:
-            print(f"Launching browser for {url}...")
-            self.page = ChromiumPage()
-            self.page.listen.start()
-            self.page.get(f"{url}&cc_load_policy=1") 
-            
+            print(f"Loading {url}...")
+            page = self._get_page()
+            # Only capture the subtitle API fetches (GET), not every page request
+            page.listen.start('timedtext', method='GET')
+            page.get(f"{url}&cc_load_policy=1")
+
             # Use the internal wait helper
-            json_path = self._wait_for_subs(self.page)
-            self.page.quit()
+            json_path = self._wait_for_subs(page)
+            page.listen.stop()
         except Exception as e:
             print(f"Browser automation failed: {e}")
-            if self.page:
-                self.page.quit()
+            self.close()
             return None
             
-        if json_path:
-            return post_load_json(json_path)
-        return None
+        if not json_path:
+            return None
+        txt_path = post_load_json(json_path)
+        if txt_path:
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(txt_path, cache_file)
+            except OSError as e:
+                logger.warning(f"Failed to write captions cache: {e}")
+        return txt_path
 
 # --- Main RAG Engine ---
 
@@ -432,6 +1402,10 @@ class RAGEngine:
     def __init__(self, knowledge_base=None):
         self.knowledge_base = knowledge_base
         self.youtube_searcher = YouTubeSearcher()
+
+    def close(self):
+        """Quit the YouTube browser, if one was started. Call when done."""
+        self.youtube_searcher.close()
     
     def ingest_pdf(self, pdf_path: str) -> Dict[str, Any]:
         """
@@ -439,81 +1413,223 @@ class RAGEngine:
         """
         logger.info(f"Ingesting PDF: {pdf_path}")
         try:
-            topics_map = extract_topics_scanned(pdf_path)
+            cache_file = _topics_cache_file(pdf_path)
+            topics_map = _load_cached_topics(cache_file)
+            if topics_map is None:
+                topics_map = extract_topics_scanned(pdf_path)
+                _store_cached_topics(cache_file, topics_map)
             return {"status": "success", "topics_map": topics_map}
         except Exception as e:
             logger.error(f"Failed to ingest PDF: {e}")
             return {"status": "error", "message": str(e)}
 
+    def ingest_pdfs(self, pdf_paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Ingest several PDFs, keyed by path in the result.
+
+        With Ray installed the page batches of all PDFs are spread over the
+        Ray cluster; otherwise the PDFs are ingested one after another (each
+        still OCR'd in parallel locally).
+        """
+        if not HAS_RAY:
+            return {pdf_path: self.ingest_pdf(pdf_path) for pdf_path in pdf_paths}
+
+        report = {}
+        cache_files = {}
+        for pdf_path in pdf_paths:
+            try:
+                cache_file = _topics_cache_file(pdf_path)
+            except OSError as e:
+                logger.error(f"Failed to ingest PDF {pdf_path}: {e}")
+                report[pdf_path] = {"status": "error", "message": str(e)}
+                continue
+            topics_map = _load_cached_topics(cache_file)
+            if topics_map is not None:
+                report[pdf_path] = {"status": "success", "topics_map": topics_map}
+            else:
+                cache_files[pdf_path] = cache_file
+
+        if cache_files:
+            logger.info(f"Ingesting {len(cache_files)} PDFs with Ray")
+            for pdf_path, result in extract_topics_scanned_many(list(cache_files)).items():
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to ingest PDF {pdf_path}: {result}")
+                    report[pdf_path] = {"status": "error", "message": str(result)}
+                else:
+                    _store_cached_topics(cache_files[pdf_path], result)
+                    report[pdf_path] = {"status": "success", "topics_map": result}
+        # Keep the caller's ordering
+        return {pdf_path: report[pdf_path] for pdf_path in pdf_paths}
+
     def search_multimedia(self, topic_name: str, course_context: str, university_context: str = ""):
         """
         Search for multimedia content (YouTube) for a topic.
         """
         return self.youtube_searcher.search_and_get_subtitles(course_context, topic_name, university_context)
 
-    def ask_youtube(self, url: str, query: str) -> str:
+    async def aingest_pdf(self, pdf_path: str) -> Dict[str, Any]:
         """
-        End-to-end RAG on a YouTube video.
+        Async variant of ingest_pdf; the OCR runs in a worker thread.
+        """
+        return await asyncio.to_thread(self.ingest_pdf, pdf_path)
+
+    async def asearch_multimedia(self, topic_name: str, course_context: str, university_context: str = ""):
+        """
+        Async variant of search_multimedia; the browser automation runs in a
+        worker thread.
+        """
+        return await asyncio.to_thread(self.search_multimedia, topic_name, course_context, university_context)
+
+    async def answer_with_sources(self, pdf_path: str, topic_name: str, course_context: str,
+                                  university_context: str = "") -> Dict[str, Any]:
+        """
+        Gather context for a topic from both a PDF and YouTube at once.
+        The two lookups run concurrently, so this takes as long as the slower one.
+        """
+        pdf_ctx, yt_ctx = await asyncio.gather(
+            self.aingest_pdf(pdf_path),
+            self.asearch_multimedia(topic_name, course_context, university_context),
+        )
+        return {"pdf": pdf_ctx, "youtube": yt_ctx}
+
+    def _youtube_chain(self, url: str):
+        """
+        Fetch captions for a video and build its RAG chain.
+        Returns (chain, None) or (None, error message).
         """
         # 1. Fetch Captions
         txt_path = self.youtube_searcher.fetch_captions(url)
         if not txt_path:
-            return "Failed to fetch or process subtitles."
+            return None, "Failed to fetch or process subtitles."
 
         # 2. Create Chain
-        chain = create_main_chain(txt_path)
+        chain = get_main_chain(txt_path)
         if not chain:
-            return "Failed to create reasoning chain."
+            return None, "Failed to create reasoning chain."
+        return chain, None
+
+    def ask_youtube(self, url: str, query: str) -> str:
+        """
+        End-to-end RAG on a YouTube video.
+        """
+        return "".join(self.ask_youtube_stream(url, query))
+
+    def ask_youtube_stream(self, url: str, query: str) -> Iterator[str]:
+        """
+        Like ask_youtube, but yields the answer in chunks as Gemini produces
+        them, so callers can show it before generation finishes.
+        """
+        chain, error = self._youtube_chain(url)
+        if error:
+            yield error
+            return
 
-        # 3. Invoke
+        # 3. Stream
         try:
-            result = chain.invoke(query)
-            return result
+            yield from chain.stream(query)
         except Exception as e:
-            return f"Error during query: {e}"
+            yield f"Error during query: {e}"
 
-    def generate_quiz_from_video(self, url: str, num_questions: int = 5) -> List[Question]:
+    async def aask_youtube_stream(self, url: str, query: str) -> AsyncIterator[str]:
         """
-        Generates a quiz from a YouTube video.
+        Async variant of ask_youtube_stream. Caption fetching (browser
+        automation) runs in a worker thread.
+        """
+        chain, error = await asyncio.to_thread(self._youtube_chain, url)
+        if error:
+            yield error
+            return
+
+        try:
+            async for chunk in chain.astream(query):
+                yield chunk
+        except Exception as e:
+            yield f"Error during query: {e}"
+
+    async def aask_youtube_many(self, url: str, queries: List[str]) -> List[str]:
+        """
+        Answer several questions about one video. The chain is built once
+        and all questions are sent to Gemini concurrently.
+        """
+        chain, error = await asyncio.to_thread(self._youtube_chain, url)
+        if error:
+            return [error] * len(queries)
+
+        results = await asyncio.gather(*(chain.ainvoke(q) for q in queries), return_exceptions=True)
+        return [f"Error during query: {r}" if isinstance(r, Exception) else r for r in results]
+
+    def ask_youtube_many(self, url: str, queries: List[str]) -> List[str]:
+        """
+        Blocking wrapper around aask_youtube_many.
+        """
+        return _run_async(self.aask_youtube_many(url, queries))
+
+    def _quiz_prompt(self, url: str, num_questions: int) -> Optional[str]:
+        """
+        Build the quiz prompt for a video, or None if captions are unavailable.
         """
         # 1. Fetch Captions
         txt_path = self.youtube_searcher.fetch_captions(url)
         if not txt_path:
             logger.error("Failed to fetch subtitles.")
-            return []
+            return None
 
         # 2. Read transcript
-        with open(txt_path, "r", encoding="utf-8") as f:
-            transcript = f.read()
+        transcript = read_transcript(txt_path)
 
-        # 3. Generate Questions
-        llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.7)
-        
-        prompt = f"""
+        return f"""
         Generate {num_questions} multiple-choice questions based on the following transcript.
         Return the result as a raw JSON list of objects (no markdown formatting) with keys: 'question', 'options' (list of strings), 'answer' (correct option string).
         
         Transcript:
         {transcript[:20000]}
         """
-        
+
+    @staticmethod
+    def _parse_quiz(content: str) -> List[Question]:
+        data = orjson.loads(strip_json_fence(content))
+        questions = []
+        for item in data:
+            q = Question(
+                topic="YouTube Video", 
+                question=item['question'],
+                answer=item['answer'],
+                options=item.get('options', []),
+                difficulty="medium",
+                type="multiple_choice"
+            )
+            questions.append(q)
+        return questions
+
+    def generate_quiz_from_video(self, url: str, num_questions: int = 5) -> List[Question]:
+        """
+        Generates a quiz from a YouTube video.
+        """
+        prompt = self._quiz_prompt(url, num_questions)
+        if prompt is None:
+            return []
+
+        # 3. Generate Questions
+        llm = get_chat_model(0.7)
         try:
             response = llm.invoke(prompt)
-            content = response.content.replace("```json", "").replace("```", "").strip()
-            
-            data = json.loads(content)
-            questions = []
-            for item in data:
-                q = Question(
-                    topic="YouTube Video", 
-                    question=item['question'],
-                    answer=item['answer'],
-                    options=item.get('options', []),
-                    difficulty="medium",
-                    type="multiple_choice"
-                )
-                questions.append(q)
-            return questions
+            return self._parse_quiz(response.content)
+        except Exception as e:
+            logger.error(f"Quiz generation failed: {e}")
+            return []
+
+    async def agenerate_quiz_from_video(self, url: str, num_questions: int = 5) -> List[Question]:
+        """
+        Async variant of generate_quiz_from_video.
+        """
+        prompt = await asyncio.to_thread(self._quiz_prompt, url, num_questions)
+        if prompt is None:
+            return []
+
+        llm = get_chat_model(0.7)
+        try:
+            response = await llm.ainvoke(prompt)
+            return self._parse_quiz(response.content)
         except Exception as e:
             logger.error(f"Quiz generation failed: {e}")
             return []
@@ -544,25 +1660,24 @@ class RAGEngine:
                 ))
         return questions
 
-    def analyze_video_structure(self, url: str, topic_name: str) -> Dict[str, Any]:
+    def _analysis_prompt(self, url: str, topic_name: str) -> Optional[str]:
         """
-        Analyze a video to generate Notes, Mindmap, and Differences.
-        Returns a dictionary with 'notes', 'mindmap_script', 'differences'.
+        Build the structure-analysis prompt for a video, or None if captions
+        are unavailable.
         """
         # 1. Fetch Captions
         txt_path = self.youtube_searcher.fetch_captions(url)
         if not txt_path:
-            return {"error": "Failed to fetch subtitles"}
+            return None
 
-        with open(txt_path, "r", encoding="utf-8") as f:
-            transcript = f.read()
+        transcript = read_transcript(txt_path)
 
-        llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.7)
-        
         # We can do this in one comprehensive prompt or multiple. 
         # For better structure, let's use a structured prompt.
         
-        prompt = f"""
+        # Truncate transcript to avoid token limits if necessary, though 2.5 Flash has 1M context. 
+        # We'll trust the model to handle it, but keep a safety limit if it's huge.
+        return f"""
         Analyze the following YouTube transcript for the topic "{topic_name}".
         
         Provide the output in valid JSON format with the following keys:
@@ -575,19 +1690,51 @@ class RAGEngine:
         Transcript:
         {transcript[:25000]} 
         """
-        # Truncate transcript to avoid token limits if necessary, though 2.5 Flash has 1M context. 
-        # We'll trust the model to handle it, but keep a safety limit if it's huge.
-        
+
+    def analyze_video_structure(self, url: str, topic_name: str) -> Dict[str, Any]:
+        """
+        Analyze a video to generate Notes, Mindmap, and Differences.
+        Returns a dictionary with 'notes', 'mindmap_script', 'differences'.
+        """
+        prompt = self._analysis_prompt(url, topic_name)
+        if prompt is None:
+            return {"error": "Failed to fetch subtitles"}
+
+        llm = get_chat_model(0.7)
         try:
-            from langchain_core.messages import HumanMessage
             response = llm.invoke([HumanMessage(content=prompt)])
-            content = response.content.replace("```json", "").replace("```", "").strip()
-            
-            # Simple JSON cleanup if model adds text around it
-            if content.startswith("json"): content = content[4:]
-            
-            data = json.loads(content)
-            return data
+            return orjson.loads(strip_json_fence(response.content))
+        except Exception as e:
+            logger.error(f"Video analysis failed: {e}")
+            return {"error": str(e)}
+
+    async def aanalyze_video_structure(self, url: str, topic_name: str) -> Dict[str, Any]:
+        """
+        Async variant of analyze_video_structure.
+        """
+        prompt = await asyncio.to_thread(self._analysis_prompt, url, topic_name)
+        if prompt is None:
+            return {"error": "Failed to fetch subtitles"}
+
+        llm = get_chat_model(0.7)
+        try:
+            response = await llm.ainvoke([HumanMessage(content=prompt)])
+            return orjson.loads(strip_json_fence(response.content))
         except Exception as e:
             logger.error(f"Video analysis failed: {e}")
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
+
+    async def full_video_workflow(self, url: str, topic_name: str, num_questions: int = 5) -> Dict[str, Any]:
+        """
+        Quiz and structure analysis for one video, with both Gemini calls in
+        flight at once. Returns {"quiz": [...], "analysis": {...}}.
+        """
+        # Fetch captions once up front: both calls then read them from the
+        # captions cache instead of racing to drive the same browser.
+        if not await asyncio.to_thread(self.youtube_searcher.fetch_captions, url):
+            return {"quiz": [], "analysis": {"error": "Failed to fetch subtitles"}}
+        quiz, analysis = await asyncio.gather(
+            self.agenerate_quiz_from_video(url, num_questions),
+            self.aanalyze_video_structure(url, topic_name),
+        )
+        return {"quiz": quiz, "analysis": analysis}
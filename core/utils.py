@@ -2,6 +2,8 @@
 Utility functions for the AI Learning Engine.
 """
 from pathlib import Path
+from typing import Optional
+import logging
 import re
 
 def normalize_subject_name(subject_name: str) -> str:
@@ -17,3 +19,50 @@ def get_subject_dir(subject_name: str, base_path: str = "data/subjects") -> Path
     """
     safe_name = normalize_subject_name(subject_name)
     return Path(base_path) / safe_name
+
+# ":" -> " -" and "/" -> "-" in one pass (translate accepts multi-char replacements)
+_MODULE_NAME_TRANS = str.maketrans({":": " -", "/": "-"})
+
+def safe_module_dirname(module_name: str) -> str:
+    """
+    Turn a module name into its notes folder name.
+    Example: "Module 1: Intro/Basics" -> "Module 1 - Intro-Basics"
+    """
+    return module_name.translate(_MODULE_NAME_TRANS).strip()
+
+# Anything that is not a word character, space or hyphen is dropped from note filenames
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w \-]")
+
+def safe_topic_filename(topic_name: str) -> str:
+    """
+    Sanitize a topic name for use in a note filename.
+    Example: "TCP/IP: Layers" -> "TCP-IP Layers"
+    """
+    return _UNSAFE_FILENAME_CHARS.sub("", topic_name.replace("/", "-")).strip()
+
+# A whole-response markdown fence, e.g. ```json\n{...}\n```
+_JSON_FENCE_RE = re.compile(r"^\s*```(?:json)?[ \t]*\n?(.*?)\n?[ \t]*```\s*$", re.DOTALL | re.IGNORECASE)
+
+def strip_json_fence(text: str) -> str:
+    """
+    Remove a markdown code fence wrapped around a JSON response.
+
+    Only a fence enclosing the whole payload is stripped; backticks inside
+    string values (e.g. code blocks in generated notes) are left untouched.
+    """
+    match = _JSON_FENCE_RE.match(text)
+    return (match.group(1) if match else text).strip()
+
+def configure_logging(level: int = logging.INFO, filename: Optional[str] = None) -> None:
+    """
+    Configure the root logger once for the whole application.
+
+    Library modules only call logging.getLogger(__name__); entry points
+    (cli.py, the Streamlit app) call this before doing any work.
+    Repeated calls are no-ops, so Streamlit reruns are safe.
+    """
+    logging.basicConfig(
+        level=level,
+        filename=filename,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
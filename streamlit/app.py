@@ -2,16 +2,25 @@
 Streamlit app for the AI Learning Engine.
 """
 import streamlit as st
+import functools
+import multiprocessing
+import os
+import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+# Add parent directory to path. The script is re-executed on every rerun,
+# so only insert it once instead of growing sys.path each time.
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
 
-from core import KnowledgeBase, Topic, Question, create_acronym_mnemonic, get_example_difference, get_subject_dir, load_syllabus_from_json
-from visual import MindMapGenerator
+from core import KnowledgeBase, Topic, Question, create_acronym_mnemonic, get_example_difference, get_subject_dir, load_syllabus_from_json, configure_logging
+from core.utils import safe_topic_filename
 from viz_utils import plot_questions_per_module, plot_marks_distribution, analyze_repeated_questions
 import json
+import orjson
 
 def main():
     # Page configuration
@@ -23,14 +32,16 @@ def main():
     )
 
     # Initialize session state
-    if 'kb' not in st.session_state:
-        st.session_state.kb = KnowledgeBase()
     if 'current_topic' not in st.session_state:
         st.session_state.current_topic = None
     if 'quiz_mode' not in st.session_state:
         st.session_state.quiz_mode = False
     if 'current_question_idx' not in st.session_state:
         st.session_state.current_question_idx = 0
+    if 'anim_jobs' not in st.session_state:
+        # topic name -> Future of its background render
+        st.session_state.anim_jobs = {}
+        st.session_state.anim_errors = {}
 
     st.title("🧠 AI Learning Engine")
 
@@ -89,32 +100,130 @@ def main():
         show_settings_page()
 
 
+@st.cache_resource
+def _get_kb():
+    """One KnowledgeBase shared by all sessions; its connection is lock-guarded."""
+    return KnowledgeBase()
+
+
+# Knowledge-base reads are cached across reruns: every widget interaction
+# reruns the script, and the pages would otherwise query SQLite each time.
+# Entries are keyed on the database files' mtimes, so writes from the CLI
+# show up on the next rerun; the add-content page also clears them.
+def _kb_fingerprint():
+    db_path = _get_kb().db_path
+    stamps = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            stamps.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            stamps.append(0)
+    return tuple(stamps)
+
+
+@st.cache_data(max_entries=4)
+def _load_topics(fingerprint):
+    return _get_kb().get_topics()
+
+
+@st.cache_data(max_entries=64)
+def _load_questions(fingerprint, topic=None):
+    return _get_kb().get_questions(topic)
+
+
+def _topics():
+    return _load_topics(_kb_fingerprint())
+
+
+def _questions(topic=None):
+    return _load_questions(_kb_fingerprint(), topic)
+
+
 def get_current_subject():
+    # Called several times per topic card: open directly rather than an
+    # exists() check plus open
     try:
-        if Path("data/.current_subject").exists():
-            with open("data/.current_subject", "r") as f:
-                return f.read().strip()
-    except:
-        pass
-    return None
+        with open("data/.current_subject", "r") as f:
+            return f.read().strip()
+    except (OSError, ValueError):
+        return None
 
-def get_mermaid_content(topic_name):
-    """Finds the mermaid markdown file for a topic."""
+# "3. Topic_mermaid.md" -> "Topic_mermaid.md"
+_NOTE_ORDER_PREFIX = re.compile(r"^\d+\.\s*")
+
+
+def _notes_fingerprint(notes_dir):
+    """
+    mtimes of the notes directory and its module directories. Adding,
+    removing or renaming a note changes its directory's mtime, so this keys
+    the note index without walking the whole tree.
+    """
+    try:
+        with os.scandir(notes_dir) as entries:
+            stamps = [entry.stat().st_mtime_ns for entry in entries if entry.is_dir()]
+        stamps.append(os.stat(notes_dir).st_mtime_ns)
+    except OSError:
+        return ()
+    return tuple(sorted(stamps))
+
+
+@st.cache_data(ttl=60, max_entries=8)
+def _note_index(notes_dir: str, fingerprint: tuple) -> tuple:
+    """
+    Map every file under a subject's notes tree, keyed by its name without
+    the "N. " ordering prefix, to its path. One walk serves all the topic
+    cards on a page instead of an rglob per topic and file kind.
+    Also returns a second map from those names to the PYQ_Solutions.md of
+    the module directory holding them, where there is one.
+    """
+    index, pyq = {}, {}
+    for root, dirs, files in os.walk(notes_dir):
+        dirs.sort()
+        pyq_path = os.path.join(root, "PYQ_Solutions.md") if "PYQ_Solutions.md" in files else None
+        for name in sorted(files):
+            key = _NOTE_ORDER_PREFIX.sub("", name, count=1)
+            if key in index:
+                continue
+            index[key] = os.path.join(root, name)
+            if pyq_path:
+                pyq[key] = pyq_path
+    return index, pyq
+
+
+def _notes():
+    """(files, pyq) note index of the current subject."""
     subject = get_current_subject()
     if not subject:
-        return None
-        
-    safe_name = "".join([c for c in topic_name if c.isalpha() or c.isdigit() or c in (' ', '-', '_')]).strip()
-    search_pattern = f"*{safe_name}_mermaid.md"
-    
-    subject_dir = get_subject_dir(subject) / "notes"
-    if not subject_dir.exists():
-        return None
-        
-    found = list(subject_dir.rglob(search_pattern))
+        return {}, {}
+    notes_dir = os.path.join(get_subject_dir(subject), "notes")
+    return _note_index(notes_dir, _notes_fingerprint(notes_dir))
+
+
+def _find_note(filename):
+    """Path of a note file of the current subject, or None."""
+    return _notes()[0].get(filename)
+
+
+@st.cache_data(max_entries=32)
+def _read_note_text(path: str, mtime_ns: int) -> str:
+    # mtime_ns only keys the cache, so an edited file is re-read
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@functools.lru_cache(maxsize=512)
+def _cached_mnemonic(topic_name, key_points):
+    """Acronym mnemonic per (topic, key points); the result is shared, don't mutate it."""
+    return create_acronym_mnemonic(topic_name, list(key_points))
+
+
+def get_mermaid_content(topic_name):
+    """Finds the mermaid markdown file for a topic."""
+    safe_name = safe_topic_filename(topic_name)
+    found = _find_note(f"{safe_name}_mermaid.md")
     if found:
         try:
-            with open(found[0], "r", encoding="utf-8") as f:
+            with open(found, "r", encoding="utf-8") as f:
                 return f.read()
         except:
             return None
@@ -122,31 +231,38 @@ def get_mermaid_content(topic_name):
 
 def get_animation_content(topic_name):
     """Finds the animation GIF/Video for a topic."""
-    subject = get_current_subject()
-    if not subject:
-        return None
-        
-    safe_name = "".join([c for c in topic_name if c.isalpha() or c.isdigit() or c in (' ', '-', '_')]).strip()
-    search_pattern = f"*{safe_name}_anim.gif" # Prefer GIF
-    
-    subject_dir = get_subject_dir(subject) / "notes"
-    if not subject_dir.exists():
-        return None
-        
-    found = list(subject_dir.rglob(search_pattern))
-    if found:
-        return str(found[0])
-        
-    # Check for mp4
-    search_pattern = f"*{safe_name}_anim.mp4"
-    found = list(subject_dir.rglob(search_pattern))
-    if found:
-        return str(found[0])
-        
-    return None
+    safe_name = safe_topic_filename(topic_name)
+    # Prefer GIF, then mp4
+    return _find_note(f"{safe_name}_anim.gif") or _find_note(f"{safe_name}_anim.mp4")
+
+@st.cache_resource
+def _render_pool():
+    """Worker processes shared by all sessions for rendering animations."""
+    # Spawned, not forked: forking Streamlit's multi-threaded server can
+    # leave locks held by other threads (logging, HTTP clients) locked in
+    # the child
+    return ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn"))
+
+@st.fragment(run_every=2)
+def _watch_animation_jobs():
+    """Poll pending animation renders and rerun the page once any finishes."""
+    jobs = st.session_state.anim_jobs
+    finished = [name for name, future in jobs.items() if future.done()]
+    if not finished:
+        return
+    for name in finished:
+        error = jobs.pop(name).exception()
+        if error:
+            st.session_state.anim_errors[name] = str(error)
+    st.rerun()
 
 def generate_topic_animation(topic_name, summary):
-    """Generates an animation script using Gemini and renders it."""
+    """
+    Generates an animation script using Gemini and starts rendering it.
+
+    Returns the render job's Future (the file exists once it is done), or
+    None if the script could not be generated.
+    """
     try:
         from langchain_google_genai import ChatGoogleGenerativeAI
         from core.models import AnimationScript
@@ -179,29 +295,94 @@ def generate_topic_animation(topic_name, summary):
             
         # Determine output path
         subject = get_current_subject()
-        safe_name = "".join([c for c in topic_name if c.isalpha() or c.isdigit() or c in (' ', '-', '_')]).strip()
+        safe_name = safe_topic_filename(topic_name)
         
         # We need to find the topic directory. Heuristic: look for existing note or mermaid file
         subject_dir = get_subject_dir(subject) / "notes"
         # Try to find where the topic note is
-        found_notes = list(subject_dir.rglob(f"*{safe_name}.md"))
+        found_note = _find_note(f"{safe_name}.md")
         
-        if found_notes:
-            output_dir = found_notes[0].parent
+        if found_note:
+            output_dir = Path(found_note).parent
         else:
             output_dir = subject_dir # Fallback
             
         output_path = output_dir / f"{safe_name}_anim.gif"
         
-        with st.spinner("Rendering animation frames..."):
-            render_animation_from_script(script, str(output_path))
-            
-        return str(output_path)
+        # Render in a worker process; _watch_animation_jobs picks up the result
+        future = _render_pool().submit(render_animation_from_script, script, str(output_path))
+        st.session_state.anim_jobs[topic_name] = future
+        return future
 
     except Exception as e:
         st.error(f"Animation generation failed: {e}")
         return None
 
+@st.fragment
+def _render_syllabus_module(i, module):
+    """
+    Edit widgets for one syllabus module. As a fragment, typing in a field
+    reruns only this module rather than the whole syllabus tree; the
+    add/delete buttons still trigger a full rerun.
+    """
+    with st.expander(f"Module {i+1}: {module.get('name', 'Untitled')}"):
+        # Module Edit Form
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            new_mod_name = st.text_input(f"Name (Mod {i+1})", module.get("name", ""), key=f"mod_name_{i}")
+            module["name"] = new_mod_name
+        with col2:
+            if st.button("🗑️ Delete Module", key=f"del_mod_{i}"):
+                st.session_state.delete_module_idx = i
+                st.rerun()
+
+        new_mod_desc = st.text_area(f"Description (Mod {i+1})", module.get("description", ""), key=f"mod_desc_{i}")
+        module["description"] = new_mod_desc
+        
+        # Topics in Module
+        st.markdown("#### Topics")
+        topics = module.get("topics", [])
+        
+        # Helper to delete topic
+        if f"delete_topic_{i}_idx" not in st.session_state:
+            st.session_state[f"delete_topic_{i}_idx"] = None
+
+        for j, topic in enumerate(topics):
+            with st.container():
+                c1, c2 = st.columns([4, 1])
+                with c1:
+                    new_topic_name = st.text_input(f"Topic {j+1}", topic.get("name", ""), key=f"t_name_{i}_{j}")
+                    topic["name"] = new_topic_name
+                with c2:
+                    if st.button("🗑️", key=f"del_t_{i}_{j}"):
+                        st.session_state[f"delete_topic_{i}_idx"] = j
+                        st.rerun()
+                
+                with st.expander("Topic Details"):
+                    new_t_summary = st.text_area("Summary", topic.get("summary", ""), key=f"t_sum_{i}_{j}")
+                    topic["summary"] = new_t_summary
+                    
+                    # Key Points (Comma separated for simplicity)
+                    current_kps = ", ".join(topic.get("key_points", []))
+                    new_kps = st.text_area("Key Points (comma separated)", current_kps, key=f"t_kp_{i}_{j}")
+                    topic["key_points"] = [k.strip() for k in new_kps.split(",") if k.strip()]
+
+        # Handle Topic Deletion
+        if st.session_state[f"delete_topic_{i}_idx"] is not None:
+            del topics[st.session_state[f"delete_topic_{i}_idx"]]
+            st.session_state[f"delete_topic_{i}_idx"] = None
+            st.rerun()
+
+        # Add Topic
+        if st.button("➕ Add Topic", key=f"add_t_{i}"):
+            topics.append({
+                "name": "New Topic",
+                "summary": "",
+                "key_points": []
+            })
+            st.rerun()
+
+
 def show_settings_page():
     st.header("⚙️ Schema & Data Management")
     
@@ -248,62 +429,7 @@ def show_settings_page():
             modules = syllabus.get("modules", [])
             
             for i, module in enumerate(modules):
-                with st.expander(f"Module {i+1}: {module.get('name', 'Untitled')}"):
-                    # Module Edit Form
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        new_mod_name = st.text_input(f"Name (Mod {i+1})", module.get("name", ""), key=f"mod_name_{i}")
-                        module["name"] = new_mod_name
-                    with col2:
-                        if st.button("🗑️ Delete Module", key=f"del_mod_{i}"):
-                            st.session_state.delete_module_idx = i
-                            st.rerun()
-
-                    new_mod_desc = st.text_area(f"Description (Mod {i+1})", module.get("description", ""), key=f"mod_desc_{i}")
-                    module["description"] = new_mod_desc
-                    
-                    # Topics in Module
-                    st.markdown("#### Topics")
-                    topics = module.get("topics", [])
-                    
-                    # Helper to delete topic
-                    if f"delete_topic_{i}_idx" not in st.session_state:
-                        st.session_state[f"delete_topic_{i}_idx"] = None
-
-                    for j, topic in enumerate(topics):
-                        with st.container():
-                            c1, c2 = st.columns([4, 1])
-                            with c1:
-                                new_topic_name = st.text_input(f"Topic {j+1}", topic.get("name", ""), key=f"t_name_{i}_{j}")
-                                topic["name"] = new_topic_name
-                            with c2:
-                                if st.button("🗑️", key=f"del_t_{i}_{j}"):
-                                    st.session_state[f"delete_topic_{i}_idx"] = j
-                                    st.rerun()
-                            
-                            with st.expander("Topic Details"):
-                                new_t_summary = st.text_area("Summary", topic.get("summary", ""), key=f"t_sum_{i}_{j}")
-                                topic["summary"] = new_t_summary
-                                
-                                # Key Points (Comma separated for simplicity)
-                                current_kps = ", ".join(topic.get("key_points", []))
-                                new_kps = st.text_area("Key Points (comma separated)", current_kps, key=f"t_kp_{i}_{j}")
-                                topic["key_points"] = [k.strip() for k in new_kps.split(",") if k.strip()]
-
-                    # Handle Topic Deletion
-                    if st.session_state[f"delete_topic_{i}_idx"] is not None:
-                        del topics[st.session_state[f"delete_topic_{i}_idx"]]
-                        st.session_state[f"delete_topic_{i}_idx"] = None
-                        st.rerun()
-
-                    # Add Topic
-                    if st.button("➕ Add Topic", key=f"add_t_{i}"):
-                        topics.append({
-                            "name": "New Topic",
-                            "summary": "",
-                            "key_points": []
-                        })
-                        st.rerun()
+                _render_syllabus_module(i, module)
 
             # Handle Module Deletion
             if st.session_state.delete_module_idx is not None:
@@ -325,8 +451,9 @@ def show_settings_page():
             # Save Changes
             if st.button("💾 Save Changes", type="primary"):
                 try:
-                    with open(syllabus_path, "w", encoding="utf-8") as f:
-                        json.dump(syllabus, f, indent=2)
+                    syllabus_path.write_bytes(
+                        orjson.dumps(syllabus, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+                    )
                     st.success("Syllabus updated successfully!")
                     # TODO: Trigger re-generation of markdown notes if needed? 
                     # For now just saving JSON source of truth.
@@ -339,28 +466,14 @@ def get_pyq_content(topic_name, module_id=None):
     if not subject:
         return None
     
-    # Heuristic: We need to find the module folder.
-    # Since we don't have direct module link in flat topic list easily without loading syllabus again,
-    # let's try to find the topic file and look in its parent folder for PYQ_Solutions.md
-    
-    safe_name = "".join([c for c in topic_name if c.isalpha() or c.isdigit() or c in (' ', '-', '_')]).strip()
-    search_pattern = f"*{safe_name}.md"
-    
-    subject_dir = get_subject_dir(subject) / "notes"
-    if not subject_dir.exists():
-        return None
-        
-    found_notes = list(subject_dir.rglob(search_pattern))
-    if found_notes:
-        # Check if PYQ_Solutions.md exists in the same directory (Module directory)
-        module_dir = found_notes[0].parent
-        pyq_file = module_dir / "PYQ_Solutions.md"
-        if pyq_file.exists():
-            try:
-                with open(pyq_file, "r", encoding="utf-8") as f:
-                    return f.read()
-            except:
-                return None
+    # The note index already pairs each topic note with its module's PYQ_Solutions.md
+    pyq_file = _notes()[1].get(f"{safe_topic_filename(topic_name)}.md")
+    if pyq_file:
+        # Sibling topics share one module file, so reads are cached per mtime
+        try:
+            return _read_note_text(pyq_file, os.stat(pyq_file).st_mtime_ns)
+        except:
+            return None
     return None
 
 def show_question_bank_page():
@@ -372,13 +485,13 @@ def show_question_bank_page():
         return
 
     # Load analyzed questions
-    questions_data = st.session_state.kb.get_analyzed_questions(subject)
+    questions_data = _get_kb().get_analyzed_questions(subject)
     if not questions_data:
         st.info("No analyzed questions found for this subject. Use 'ingest-paper' in CLI to add questions.")
         return
         
-    from core.models import AnalyzedQuestion
-    questions = [AnalyzedQuestion(**q) for q in questions_data]
+    from core.models import AnalyzedQuestionList
+    questions = AnalyzedQuestionList.validate_python(questions_data)
     
     # 1. Overview Visualization
     st.markdown("### 📊 Subject Overview")
@@ -442,6 +555,9 @@ def show_topics_page():
         
     syllabus = load_syllabus_from_json(syllabus_path)
     
+    if st.session_state.anim_jobs:
+        _watch_animation_jobs()
+    
     # Iterate Modules
     for module in syllabus.modules:
         with st.expander(f"📦 {module.name}", expanded=False):
@@ -457,14 +573,12 @@ def show_topics_page():
                 col1, col2 = st.columns([3, 1])
                 
                 with col1:
+                    # One element per list rather than one per line item
                     if topic.key_points:
-                        st.markdown("**Key Points:**")
-                        for kp in topic.key_points:
-                            st.markdown(f"- {kp}")
+                        st.markdown("**Key Points:**\n" + "\n".join(f"- {kp}" for kp in topic.key_points))
                                 
                     if topic.mnemonics:
-                         for m in topic.mnemonics:
-                            st.info(f"🧠 Mnemonic: {m}")
+                        st.info("\n\n".join(f"🧠 Mnemonic: {m}" for m in topic.mnemonics))
                             
                     # Show Mermaid Diagram
                     mermaid_content = get_mermaid_content(topic.name)
@@ -482,11 +596,16 @@ def show_topics_page():
                     # Actions
                     if topic.key_points:
                         if st.button("🪄 Mnemonic", key=f"gen_mnem_{topic.id}"):
-                            mnemonic = create_acronym_mnemonic(topic.name, topic.key_points)
+                            mnemonic = _cached_mnemonic(topic.name, tuple(topic.key_points))
                             st.success(f"**{mnemonic.content}**")
                             
+                    anim_error = st.session_state.anim_errors.pop(topic.name, None)
+                    if anim_error:
+                        st.error(f"Animation generation failed: {anim_error}")
                     anim_path = get_animation_content(topic.name)
-                    if anim_path:
+                    if topic.name in st.session_state.anim_jobs:
+                        st.caption("🎬 Rendering animation...")
+                    elif anim_path:
                         if anim_path.endswith('.gif'):
                             st.image(anim_path)
                         else:
@@ -501,46 +620,44 @@ def show_topics_page():
 def show_mindmap_page():
     st.header("🗺️ Mind Map Explorer")
     
-    topics = st.session_state.kb.get_topics()
+    topics = _topics()
     
     if not topics:
         st.warning("No topics found. Add some topics first!")
         return
     
     # Generate mind map
+    from visual import MindMapGenerator
     generator = MindMapGenerator()
     generator.add_topics_from_syllabus(topics, root_name="My Learning Path")
     
-    graph_data = generator.get_graph_data()
-    
     st.markdown("### Topic Relationships")
     
     # Display as a simple tree structure
-    st.markdown("**Root: My Learning Path**")
+    tree = ["**Root: My Learning Path**", ""]
     for topic in topics:
-        st.markdown(f"  - {topic.name}")
-        for subtopic in topic.subtopics:
-            st.markdown(f"    - {subtopic}")
+        tree.append(f"- {topic.name}")
+        tree.extend(f"  - {subtopic}" for subtopic in topic.subtopics)
+    st.markdown("\n".join(tree))
     
     # Export options
     col1, col2 = st.columns(2)
     with col1:
         if st.button("Export as JSON"):
             try:
-                generator.export_to_json("data/mindmap.json")
+                # Serialize once; the same bytes back the file and the download
+                json_bytes = generator.to_json_bytes()
+                export_path = Path("data/mindmap.json")
+                export_path.parent.mkdir(parents=True, exist_ok=True)
+                export_path.write_bytes(json_bytes)
                 st.success("Mind map exported to data/mindmap.json")
                 
-                # Check if file exists before reading
-                if Path("data/mindmap.json").exists():
-                    with open("data/mindmap.json", "r") as f:
-                        st.download_button(
-                            label="Download JSON",
-                            data=f.read(),
-                            file_name="mindmap.json",
-                            mime="application/json"
-                        )
-                else:
-                    st.error("Export file not found")
+                st.download_button(
+                    label="Download JSON",
+                    data=json_bytes,
+                    file_name="mindmap.json",
+                    mime="application/json"
+                )
             except Exception as e:
                 st.error(f"Error exporting mind map: {e}")
 
@@ -548,7 +665,7 @@ def show_mindmap_page():
 def show_quiz_page():
     st.header("❓ Quiz Mode")
     
-    topics = st.session_state.kb.get_topics()
+    topics = _topics()
     
     if not topics:
         st.warning("No topics found. Add some topics first!")
@@ -560,9 +677,9 @@ def show_quiz_page():
     
     # Get questions
     if selected_topic == "All Topics":
-        questions = st.session_state.kb.get_questions()
+        questions = _questions()
     else:
-        questions = st.session_state.kb.get_questions(selected_topic)
+        questions = _questions(selected_topic)
     
     if not questions:
         st.info("No questions available for this topic yet.")
@@ -610,19 +727,12 @@ def show_differences_page():
     if diff:
         st.markdown(f"### {diff.concept_a} vs {diff.concept_b}")
         
-        # Create a comparison table
-        import pandas as pd
-        
-        data = []
-        for item in diff.differences:
-            data.append({
-                "Aspect": item["aspect"],
-                diff.concept_a: item["concept_a_value"],
-                diff.concept_b: item["concept_b_value"]
-            })
-        
-        df = pd.DataFrame(data)
-        st.table(df)
+        # Create a comparison table (column-wise; st.table takes the dict as is)
+        st.table({
+            "Aspect": [item.aspect for item in diff.differences],
+            diff.concept_a: [item.concept_a_value for item in diff.differences],
+            diff.concept_b: [item.concept_b_value for item in diff.differences],
+        })
 
 
 def show_animations_page():
@@ -674,13 +784,14 @@ def show_add_content_page():
                         key_points=[kp.strip() for kp in key_points.split("\n") if kp.strip()],
                         subtopics=[st.strip() for st in subtopics.split(",") if st.strip()]
                     )
-                    st.session_state.kb.save_topic(topic)
+                    _get_kb().save_topic(topic)
+                    _load_topics.clear()
                     st.success(f"Topic '{name}' added successfully!")
                 else:
                     st.error("Please fill in all required fields (*)")
     
     elif content_type == "Question":
-        topics = st.session_state.kb.get_topics()
+        topics = _topics()
         topic_names = [topic.name for topic in topics]
         
         if not topic_names:
@@ -703,11 +814,13 @@ def show_add_content_page():
                         answer=answer,
                         difficulty=difficulty
                     )
-                    st.session_state.kb.save_question(q)
+                    _get_kb().save_question(q)
+                    _load_questions.clear()
                     st.success("Question added successfully!")
                 else:
                     st.error("Please fill in all required fields (*)")
 
 
 if __name__ == "__main__":
+    configure_logging()
     main()
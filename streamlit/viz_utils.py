@@ -2,65 +2,136 @@
 Visualization utilities for the Streamlit app.
 """
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 import difflib
-from typing import List, Dict, Tuple
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Set, Tuple
 from core.models import AnalyzedQuestion
 import re
 
+# pandas and matplotlib are imported where used: they cost more to load than
+# the rest of the app's startup and only the analysis page needs them.
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+_CLEAN_RE = re.compile(r'[^a-z0-9\s]')
+
 def clean_text(text: str) -> str:
     """Normalize text for comparison."""
     text = text.lower()
-    text = re.sub(r'[^a-z0-9\s]', '', text)
+    text = _CLEAN_RE.sub('', text)
     return text.strip()
 
 def get_similarity(s1: str, s2: str) -> float:
     """Calculate similarity ratio between two strings."""
     return difflib.SequenceMatcher(None, clean_text(s1), clean_text(s2)).ratio()
 
-def cluster_similar_questions(questions: List[AnalyzedQuestion], threshold: float = 0.8) -> List[Dict]:
+@dataclass(slots=True)
+class Cluster:
+    """A group of similar questions, represented by the longest one's text."""
+    text: str
+    questions: List[AnalyzedQuestion]
+    years: Set[str] = field(default_factory=set)
+    total_marks: int = 0
+    modules: Set[str] = field(default_factory=set)
+
+def cluster_similar_questions(questions: List[AnalyzedQuestion], threshold: float = 0.8) -> List[Cluster]:
     """
     Cluster questions that are similar to find repeats.
-    Returns a list of clusters. Each cluster has 'main_question', 'count', 'years', 'marks'.
+    Similarity is the SequenceMatcher ratio of the cleaned texts (see
+    get_similarity). An inverted word index limits comparisons to questions
+    sharing at least one word (pairs with no word in common, e.g. every
+    word pluralised, are not compared), and the cheap
+    real_quick_ratio/quick_ratio bounds reject most of the rest before the
+    full ratio is computed.
+    Returns a list of Cluster objects.
     """
     clusters = []
     processed_ids = set()
     
     # Sort by length to use longer questions as potential "main" representatives or just stable order
     sorted_qs = sorted(questions, key=lambda q: len(q.text), reverse=True)
+    # Clean each question once rather than once per comparison
+    cleaned = [clean_text(q.text) for q in sorted_qs]
     
+    inverted = defaultdict(list)
+    for idx, text in enumerate(cleaned):
+        # Empty texts match each other (ratio 1.0), so they share a key too
+        for token in set(text.split()) or ("",):
+            inverted[token].append(idx)
+    
+    matcher = difflib.SequenceMatcher()
     for i, q1 in enumerate(sorted_qs):
         if q1.id in processed_ids:
             continue
             
-        current_cluster = {
-            "text": q1.text,
-            "questions": [q1],
-            "years": {q1.year} if q1.year else set(),
-            "total_marks": q1.marks,
-            "modules": {q1.module} if q1.module else set()
-        }
+        current_cluster = Cluster(
+            text=q1.text,
+            questions=[q1],
+            years={q1.year} if q1.year else set(),
+            total_marks=q1.marks,
+            modules={q1.module} if q1.module else set(),
+        )
         processed_ids.add(q1.id)
         
-        for j, q2 in enumerate(sorted_qs):
+        candidates = set()
+        for token in set(cleaned[i].split()) or ("",):
+            candidates.update(inverted[token])
+        matcher.set_seq1(cleaned[i])
+        # Ascending order keeps the same first-come assignment as a full scan
+        for j in sorted(candidates):
+            q2 = sorted_qs[j]
             if i == j or q2.id in processed_ids:
                 continue
                 
-            sim = get_similarity(q1.text, q2.text)
-            if sim >= threshold:
-                current_cluster["questions"].append(q2)
-                if q2.year:
-                    current_cluster["years"].add(q2.year)
-                current_cluster["total_marks"] += q2.marks
-                if q2.module:
-                    current_cluster["modules"].add(q2.module)
-                processed_ids.add(q2.id)
+            # Both quick ratios are upper bounds on ratio(), cheapest first
+            matcher.set_seq2(cleaned[j])
+            if (matcher.real_quick_ratio() < threshold
+                    or matcher.quick_ratio() < threshold
+                    or matcher.ratio() < threshold):
+                continue
+                
+            current_cluster.questions.append(q2)
+            if q2.year:
+                current_cluster.years.add(q2.year)
+            current_cluster.total_marks += q2.marks
+            if q2.module:
+                current_cluster.modules.add(q2.module)
+            processed_ids.add(q2.id)
         
         clusters.append(current_cluster)
         
     return clusters
 
+def _bar_figure(labels, values, color: str) -> "Figure":
+    from matplotlib.figure import Figure
+    # Built off pyplot so cached figures are not kept in its global registry
+    fig = Figure()
+    ax = fig.subplots()
+    ax.bar(labels, values, color=color)
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_ha('right')
+    return fig
+
+@st.cache_data(max_entries=4)
+def _build_module_figures(rows: Tuple[Tuple[str, int], ...]) -> Tuple["Figure", "Figure"]:
+    """
+    Questions-per-module and marks-per-module bar charts for (module, marks)
+    rows. Cached so reruns with an unchanged question bank skip the redraw.
+    """
+    import pandas as pd
+    
+    # Convert to DataFrame, column-wise
+    df = pd.DataFrame(list(rows), columns=["Module", "Marks"])
+    
+    # Group by Module
+    grouped = df.groupby("Module").agg(Count=("Marks", "size"), Marks=("Marks", "sum")).reset_index()
+    
+    fig1 = _bar_figure(grouped["Module"], grouped["Count"], 'skyblue')
+    fig2 = _bar_figure(grouped["Module"], grouped["Marks"], 'salmon')
+    return fig1, fig2
+
 def plot_questions_per_module(questions: List[AnalyzedQuestion]):
     """
     Plots the number of questions and total marks per module.
@@ -69,19 +140,9 @@ def plot_questions_per_module(questions: List[AnalyzedQuestion]):
         st.info("No data to visualize.")
         return
 
-    # Convert to DataFrame
-    data = []
-    for q in questions:
-        data.append({
-            "Module": q.module if q.module else "Unknown",
-            "Marks": q.marks,
-            "Count": 1
-        })
-    
-    df = pd.DataFrame(data)
-    
-    # Group by Module
-    grouped = df.groupby("Module").sum().reset_index()
+    fig1, fig2 = _build_module_figures(
+        tuple((q.module if q.module else "Unknown", q.marks) for q in questions)
+    )
     
     st.subheader("📊 Question Bank Analysis")
     
@@ -89,16 +150,10 @@ def plot_questions_per_module(questions: List[AnalyzedQuestion]):
     
     with col1:
         st.markdown("**Questions per Module**")
-        fig1, ax1 = plt.subplots()
-        ax1.bar(grouped["Module"], grouped["Count"], color='skyblue')
-        plt.xticks(rotation=45, ha='right')
         st.pyplot(fig1)
         
     with col2:
         st.markdown("**Total Marks per Module**")
-        fig2, ax2 = plt.subplots()
-        ax2.bar(grouped["Module"], grouped["Marks"], color='salmon')
-        plt.xticks(rotation=45, ha='right')
         st.pyplot(fig2)
 
 def plot_marks_distribution(questions: List[AnalyzedQuestion]):
@@ -108,24 +163,20 @@ def plot_marks_distribution(questions: List[AnalyzedQuestion]):
     if not questions:
         return
         
-    data = []
-    for q in questions:
-        if q.year and q.year != "Unknown":
-            data.append({
-                "Year": q.year,
-                "Marks": q.marks,
-                "Module": q.module
-            })
+    rows = [(q.year, q.module, q.marks) for q in questions if q.year and q.year != "Unknown"]
             
-    if not data:
+    if not rows:
         return
         
-    df = pd.DataFrame(data)
+    import pandas as pd
+    
+    years, modules, marks = zip(*rows)
+    df = pd.DataFrame({"Year": years, "Module": modules, "Marks": marks})
     
     st.subheader("📈 Marks Trend by Year")
     
     # Pivot for Stacked Bar Chart: Year vs Marks, colored by Module
-    pivot = df.pivot_table(index="Year", columns="Module", values="Marks", aggfunc="sum", fill_value=0)
+    pivot = df.groupby(["Year", "Module"])["Marks"].sum().unstack(fill_value=0)
     
     st.bar_chart(pivot)
 
@@ -147,25 +198,25 @@ def analyze_repeated_questions(questions: List[AnalyzedQuestion]):
     for c in clusters:
         # Condition: More than 1 question in cluster AND (More than 1 unique year OR Count > 2)
         # We enforce distinct years to avoid "Part A + Part B" of same year being flagged as "Recurring".
-        if len(c["questions"]) > 1 and len(c["years"]) > 1:
+        if len(c.questions) > 1 and len(c.years) > 1:
             repeats.append(c)
             
     # Sort by frequency (count) then total marks
-    repeats.sort(key=lambda c: (len(c["questions"]), c["total_marks"]), reverse=True)
+    repeats.sort(key=lambda c: (len(c.questions), c.total_marks), reverse=True)
     
     if not repeats:
         st.warning("No repeated questions found across different years.")
         return
 
     for cluster in repeats:
-        count = len(cluster["questions"])
-        years = ", ".join(sorted(list(cluster["years"])))
-        modules = ", ".join(list(cluster["modules"]))
+        count = len(cluster.questions)
+        years = ", ".join(sorted(list(cluster.years)))
+        modules = ", ".join(list(cluster.modules))
         
-        with st.expander(f"🔥 {count} Occurrences: {cluster['text'][:80]}..."):
+        with st.expander(f"🔥 {count} Occurrences: {cluster.text[:80]}..."):
             st.markdown(f"**Modules:** {modules}")
             st.markdown(f"**Years Appeared:** {years}")
-            st.markdown(f"**Total Marks Accumulation:** {cluster['total_marks']}")
-            st.markdown("**Variations:**")
-            for q in cluster["questions"]:
-                st.markdown(f"- ({q.year}) {q.text} *[{q.marks} Marks]*")
\ No newline at end of file
+            st.markdown(f"**Total Marks Accumulation:** {cluster.total_marks}")
+            st.markdown("**Variations:**\n" + "\n".join(
+                f"- ({q.year}) {q.text} *[{q.marks} Marks]*" for q in cluster.questions
+            ))
\ No newline at end of file
@@ -2,7 +2,16 @@
 Visual module for mind maps and animations.
 """
 from .mindmap import MindMapGenerator, create_simple_mindmap
-from .animate import Animator, create_tcp_handshake_animation, create_stack_animation
+
+
+def __getattr__(name):
+    # visual.animate pulls in OpenCV and NumPy; only load it when an
+    # animation helper is actually used, not on every `import visual`.
+    if name in ('Animator', 'create_tcp_handshake_animation', 'create_stack_animation'):
+        from . import animate
+        return getattr(animate, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     'MindMapGenerator',
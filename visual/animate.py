@@ -3,9 +3,19 @@ Module for creating educational animations using OpenCV.
 """
 import cv2
 import numpy as np
+import queue
+import shutil
+import threading
 from typing import List, Tuple, Optional
 from pathlib import Path
 
+# Optional: NVENC hardware H.264 encoding through ffmpeg
+try:
+    import ffmpegcv
+    HAS_FFMPEGCV = True
+except ImportError:
+    HAS_FFMPEGCV = False
+
 
 class Animator:
     """
@@ -15,18 +25,36 @@ class Animator:
         self.width = width
         self.height = height
         self.fps = fps
-        self.frames = []
+        # (frame, duration in frames) per scene; repeats are expanded on save
+        self.frames: List[Tuple[np.ndarray, int]] = []
+        # Open writer while streaming (start_streaming .. finish_streaming)
+        self._writer = None
     
     def create_blank_frame(self, bg_color: Tuple[int, int, int] = (255, 255, 255)) -> np.ndarray:
         """Create a blank frame with specified background color."""
-        return np.full((self.height, self.width, 3), bg_color, dtype=np.uint8)
+        return self.reset_frame(np.empty((self.height, self.width, 3), dtype=np.uint8), bg_color)
+    
+    def reset_frame(self, frame: np.ndarray, bg_color: Tuple[int, int, int] = (255, 255, 255)) -> np.ndarray:
+        """Clear an existing frame to the background color in place, reusing its buffer."""
+        # Both fills are SIMD memsets, far faster than numpy's per-pixel
+        # broadcast of a 3-channel color (np.full / frame[:] = color)
+        if bg_color[0] == bg_color[1] == bg_color[2]:
+            frame.fill(bg_color[0])
+        else:
+            cv2.rectangle(frame, (0, 0), (frame.shape[1], frame.shape[0]), bg_color, -1)
+        return frame
     
     def add_text(self, frame: np.ndarray, text: str, position: Tuple[int, int],
                  font_scale: float = 1.0, color: Tuple[int, int, int] = (0, 0, 0),
-                 thickness: int = 2) -> np.ndarray:
-        """Add text to a frame."""
+                 thickness: int = 2, line_type: int = cv2.LINE_8) -> np.ndarray:
+        """
+        Add text to a frame.
+        
+        LINE_8 skips anti-aliasing, which is never slower and does not
+        survive video compression anyway; pass cv2.LINE_AA for titles.
+        """
         font = cv2.FONT_HERSHEY_SIMPLEX
-        cv2.putText(frame, text, position, font, font_scale, color, thickness, cv2.LINE_AA)
+        cv2.putText(frame, text, position, font, font_scale, color, thickness, line_type)
         return frame
     
     def add_circle(self, frame: np.ndarray, center: Tuple[int, int], radius: int,
@@ -49,30 +77,114 @@ class Animator:
     
     def add_frame(self, frame: np.ndarray, duration_frames: int = 1) -> None:
         """Add a frame to the animation, repeating it for the specified duration."""
-        for _ in range(duration_frames):
-            self.frames.append(frame.copy())
+        if self._writer is not None:
+            for _ in range(duration_frames):
+                self._writer.write(frame)
+            return
+        # One snapshot per scene, however long it is shown
+        self.frames.append((frame.copy(), duration_frames))
+    
+    def start_streaming(self, output_path: str, codec: str = 'mp4v') -> None:
+        """
+        Encode frames straight into a video file as they are added, instead
+        of collecting them for save_video. Call finish_streaming() when done.
+        """
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        self._writer = self._open_cv2_writer(output_path, codec)
+    
+    def finish_streaming(self) -> None:
+        """Close the video opened by start_streaming()."""
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
     
-    def save_video(self, output_path: str, codec: str = 'mp4v') -> None:
+    def save_video(self, output_path: str, codec: str = 'mp4v', backend: str = 'auto') -> None:
         """
         Save the animation as a video file.
         
         Args:
             output_path: Path to save the video
-            codec: Video codec to use
+            codec: Video codec to use (cv2 backend). 'avc1' (H.264) lets
+                FFMPEG pick a VAAPI/MFX hardware encoder; if no H.264
+                encoder opens, mp4v is used instead.
+            backend: 'cv2' (CPU encoder), 'nvenc' (NVIDIA hardware H.264 via
+                ffmpegcv) or 'auto' (nvenc when ffmpegcv and an NVIDIA driver
+                are present, falling back to cv2 if it fails)
         """
         if not self.frames:
             raise ValueError("No frames to save")
         
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         
+        if backend == 'auto':
+            if HAS_FFMPEGCV and shutil.which("nvidia-smi"):
+                try:
+                    self._write_video(ffmpegcv.VideoWriterNV(output_path, 'h264', self.fps))
+                    return
+                except Exception:
+                    pass  # No usable encoder after all; redo on the CPU
+            backend = 'cv2'
+        
+        if backend == 'nvenc':
+            if not HAS_FFMPEGCV:
+                raise ImportError("ffmpegcv is required for the nvenc backend")
+            self._write_video(ffmpegcv.VideoWriterNV(output_path, 'h264', self.fps))
+        elif backend == 'cv2':
+            self._write_video(self._open_cv2_writer(output_path, codec))
+        else:
+            raise ValueError(f"Unknown video backend: {backend}")
+    
+    def _open_cv2_writer(self, output_path: str, codec: str):
+        """
+        cv2 writer on the FFMPEG backend with hardware acceleration requested
+        (used when the build and codec support it, software otherwise),
+        falling back to the default backend and then to mp4v.
+        """
+        size = (self.width, self.height)
         fourcc = cv2.VideoWriter_fourcc(*codec)
-        out = cv2.VideoWriter(output_path, fourcc, self.fps, (self.width, self.height))
+        if hasattr(cv2, "VIDEOWRITER_PROP_HW_ACCELERATION"):  # OpenCV >= 4.5.2
+            out = cv2.VideoWriter(output_path, cv2.CAP_FFMPEG, fourcc, self.fps, size,
+                                  [cv2.VIDEOWRITER_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY])
+            if out.isOpened():
+                return out
+        out = cv2.VideoWriter(output_path, fourcc, self.fps, size)
+        if not out.isOpened() and codec != 'mp4v':
+            out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), self.fps, size)
+        return out
+    
+    def _write_video(self, out) -> None:
+        """
+        Write every frame to an opened cv2/ffmpegcv writer and release it.
         
+        Encoding runs on a writer thread fed through a bounded queue, so it
+        overlaps with expanding the scenes into frames on this one.
+        """
+        frames: queue.Queue = queue.Queue(maxsize=16)
+        errors: List[BaseException] = []
+        
+        def writer() -> None:
+            while True:
+                frame = frames.get()
+                if frame is None:
+                    return
+                if not errors:  # After a failure keep draining so put() can't block
+                    try:
+                        out.write(frame)
+                    except BaseException as e:
+                        errors.append(e)
+        
+        worker = threading.Thread(target=writer, daemon=True)
+        worker.start()
         try:
-            for frame in self.frames:
-                out.write(frame)
+            for frame, duration_frames in self.frames:
+                for _ in range(duration_frames):
+                    frames.put(frame)
         finally:
+            frames.put(None)
+            worker.join()
             out.release()
+        if errors:
+            raise errors[0]
             
     def save_gif(self, output_path: str) -> None:
         """
@@ -83,16 +195,18 @@ class Animator:
             
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         
-        # Convert BGR (OpenCV) to RGB (PIL)
+        # Convert BGR (OpenCV) to RGB (PIL); one GIF frame per scene, shown
+        # for the scene's whole duration
         from PIL import Image
-        pil_frames = [Image.fromarray(cv2.cvtColor(f, cv2.COLOR_BGR2RGB)) for f in self.frames]
+        pil_frames = [Image.fromarray(cv2.cvtColor(f, cv2.COLOR_BGR2RGB)) for f, _ in self.frames]
+        durations = [1000 * n / self.fps for _, n in self.frames]
         
         # Save
         pil_frames[0].save(
             output_path,
             save_all=True,
             append_images=pil_frames[1:],
-            duration=1000/self.fps,
+            duration=durations,
             loop=0
         )
     
@@ -109,8 +223,10 @@ def render_animation_from_script(script: 'AnimationScript', output_path: str) ->
     
     animator = Animator(width=script.width, height=script.height, fps=script.fps)
     
+    # add_frame snapshots the canvas, so one buffer is redrawn for every scene
+    canvas = animator.create_blank_frame()
     for frame_data in script.frames:
-        canvas = animator.create_blank_frame()
+        canvas = animator.reset_frame(canvas)
         
         for cmd in frame_data.commands:
             # Convert RGB list to BGR tuple
@@ -158,41 +274,34 @@ def create_tcp_handshake_animation(output_path: str = "data/animations/tcp_hands
     client_x, client_y = 150, 300
     server_x, server_y = 650, 300
     
+    # Title, hosts and labels shared by frames 1-4, rasterized once
+    base = animator.create_blank_frame()
+    base = animator.add_text(base, "TCP 3-Way Handshake", (250, 50), font_scale=1.5, color=(0, 0, 0),
+                             line_type=cv2.LINE_AA)
+    base = animator.add_circle(base, (client_x, client_y), 40, color=(100, 100, 255))
+    base = animator.add_text(base, "Client", (client_x - 30, client_y + 80), color=(0, 0, 0))
+    base = animator.add_circle(base, (server_x, server_y), 40, color=(255, 100, 100))
+    base = animator.add_text(base, "Server", (server_x - 30, server_y + 80), color=(0, 0, 0))
+    
     # Frame 1: Initial state
-    frame = animator.create_blank_frame()
-    frame = animator.add_text(frame, "TCP 3-Way Handshake", (250, 50), font_scale=1.5, color=(0, 0, 0))
-    frame = animator.add_circle(frame, (client_x, client_y), 40, color=(100, 100, 255))
-    frame = animator.add_text(frame, "Client", (client_x - 30, client_y + 80), color=(0, 0, 0))
-    frame = animator.add_circle(frame, (server_x, server_y), 40, color=(255, 100, 100))
-    frame = animator.add_text(frame, "Server", (server_x - 30, server_y + 80), color=(0, 0, 0))
+    frame = base.copy()
     animator.add_frame(frame, duration_frames=30)
     
-    # Frame 2: SYN
-    frame = frame.copy()
+    # Frame 2: SYN, drawn over frame 1 in place (add_frame already took its snapshot)
     frame = animator.add_arrow(frame, (client_x + 50, client_y - 20), (server_x - 50, server_y - 20), 
                               color=(0, 255, 0), thickness=3)
     frame = animator.add_text(frame, "SYN", (400, 250), color=(0, 200, 0), font_scale=0.8)
     animator.add_frame(frame, duration_frames=30)
     
     # Frame 3: SYN-ACK
-    frame = animator.create_blank_frame()
-    frame = animator.add_text(frame, "TCP 3-Way Handshake", (250, 50), font_scale=1.5, color=(0, 0, 0))
-    frame = animator.add_circle(frame, (client_x, client_y), 40, color=(100, 100, 255))
-    frame = animator.add_text(frame, "Client", (client_x - 30, client_y + 80), color=(0, 0, 0))
-    frame = animator.add_circle(frame, (server_x, server_y), 40, color=(255, 100, 100))
-    frame = animator.add_text(frame, "Server", (server_x - 30, server_y + 80), color=(0, 0, 0))
+    frame = base.copy()
     frame = animator.add_arrow(frame, (server_x - 50, server_y + 20), (client_x + 50, client_y + 20),
                               color=(0, 0, 255), thickness=3)
     frame = animator.add_text(frame, "SYN-ACK", (370, 350), color=(0, 0, 200), font_scale=0.8)
     animator.add_frame(frame, duration_frames=30)
     
     # Frame 4: ACK
-    frame = animator.create_blank_frame()
-    frame = animator.add_text(frame, "TCP 3-Way Handshake", (250, 50), font_scale=1.5, color=(0, 0, 0))
-    frame = animator.add_circle(frame, (client_x, client_y), 40, color=(100, 100, 255))
-    frame = animator.add_text(frame, "Client", (client_x - 30, client_y + 80), color=(0, 0, 0))
-    frame = animator.add_circle(frame, (server_x, server_y), 40, color=(255, 100, 100))
-    frame = animator.add_text(frame, "Server", (server_x - 30, server_y + 80), color=(0, 0, 0))
+    frame = base.copy()
     frame = animator.add_arrow(frame, (client_x + 50, client_y), (server_x - 50, server_y),
                               color=(255, 0, 0), thickness=3)
     frame = animator.add_text(frame, "ACK", (400, 300), color=(200, 0, 0), font_scale=0.8)
@@ -200,7 +309,8 @@ def create_tcp_handshake_animation(output_path: str = "data/animations/tcp_hands
     
     # Frame 5: Connected
     frame = animator.create_blank_frame()
-    frame = animator.add_text(frame, "Connection Established!", (220, 50), font_scale=1.5, color=(0, 200, 0))
+    frame = animator.add_text(frame, "Connection Established!", (220, 50), font_scale=1.5, color=(0, 200, 0),
+                              line_type=cv2.LINE_AA)
     frame = animator.add_circle(frame, (client_x, client_y), 40, color=(0, 255, 0))
     frame = animator.add_text(frame, "Client", (client_x - 30, client_y + 80), color=(0, 0, 0))
     frame = animator.add_circle(frame, (server_x, server_y), 40, color=(0, 255, 0))
@@ -227,54 +337,42 @@ def create_stack_animation(output_path: str = "data/animations/stack.mp4") -> st
     item_height = 50
     item_width = 150
     
+    # Title shared by every frame, rasterized once
+    base = animator.create_blank_frame()
+    base = animator.add_text(base, "Stack: LIFO Data Structure", (200, 50), font_scale=1.2, color=(0, 0, 0),
+                             line_type=cv2.LINE_AA)
+    
     # Initial empty stack
-    frame = animator.create_blank_frame()
-    frame = animator.add_text(frame, "Stack: LIFO Data Structure", (200, 50), font_scale=1.2, color=(0, 0, 0))
+    frame = base.copy()
     animator.add_frame(frame, duration_frames=30)
     
-    # Push operations
+    # Push operations. Each push only draws the new item on top of the
+    # previous stack; stacks[i] holds the title and items 0..i.
     elements = ["Item 1", "Item 2", "Item 3"]
+    stacks = []
+    stack = base.copy()
     for i, element in enumerate(elements):
-        frame = animator.create_blank_frame()
-        frame = animator.add_text(frame, "Stack: LIFO Data Structure", (200, 50), font_scale=1.2, color=(0, 0, 0))
-        frame = animator.add_text(frame, f"PUSH: {element}", (300, 100), font_scale=0.8, color=(0, 150, 0))
-        
-        # Draw existing items
-        for j in range(i + 1):
-            y_pos = stack_y - (j * item_height)
-            frame = animator.add_rectangle(frame, 
-                                          (stack_x - item_width // 2, y_pos - item_height),
-                                          (stack_x + item_width // 2, y_pos),
-                                          color=(100, 200, 255), thickness=-1)
-            frame = animator.add_rectangle(frame,
-                                          (stack_x - item_width // 2, y_pos - item_height),
-                                          (stack_x + item_width // 2, y_pos),
-                                          color=(0, 0, 0), thickness=2)
-            frame = animator.add_text(frame, elements[j], 
-                                     (stack_x - 35, y_pos - 15), 
-                                     font_scale=0.7, color=(0, 0, 0))
-        
-        animator.add_frame(frame, duration_frames=45)
-    
-    # Pop operation
-    frame = animator.create_blank_frame()
-    frame = animator.add_text(frame, "Stack: LIFO Data Structure", (200, 50), font_scale=1.2, color=(0, 0, 0))
-    frame = animator.add_text(frame, "POP: Item 3", (300, 100), font_scale=0.8, color=(200, 0, 0))
-    
-    # Draw remaining items
-    for j in range(2):
-        y_pos = stack_y - (j * item_height)
-        frame = animator.add_rectangle(frame,
+        y_pos = stack_y - (i * item_height)
+        stack = animator.add_rectangle(stack,
                                       (stack_x - item_width // 2, y_pos - item_height),
                                       (stack_x + item_width // 2, y_pos),
                                       color=(100, 200, 255), thickness=-1)
-        frame = animator.add_rectangle(frame,
+        stack = animator.add_rectangle(stack,
                                       (stack_x - item_width // 2, y_pos - item_height),
                                       (stack_x + item_width // 2, y_pos),
                                       color=(0, 0, 0), thickness=2)
-        frame = animator.add_text(frame, elements[j],
+        stack = animator.add_text(stack, element,
                                  (stack_x - 35, y_pos - 15),
                                  font_scale=0.7, color=(0, 0, 0))
+        stacks.append(stack.copy())
+        
+        frame = stack.copy()
+        frame = animator.add_text(frame, f"PUSH: {element}", (300, 100), font_scale=0.8, color=(0, 150, 0))
+        animator.add_frame(frame, duration_frames=45)
+    
+    # Pop operation: the stack as it was before the last push
+    frame = stacks[-2].copy()
+    frame = animator.add_text(frame, "POP: Item 3", (300, 100), font_scale=0.8, color=(200, 0, 0))
     
     animator.add_frame(frame, duration_frames=60)
     
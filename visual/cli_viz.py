@@ -1,35 +1,45 @@
+import os
 import sys
 import time
 
-def visualize_data(data):
-    """A simple function to visualize data in the CLI with colors and dotted loading."""
-    # ANSI escape codes for colors
-    colors = ["\033[91m", "\033[92m", "\033[93m", "\033[94m", "\033[95m", "\033[96m"]
-    reset = "\033[0m"
+# ANSI escape codes for colors, each wrapped around a %s placeholder
+_RESET = "\033[0m"
+_COLORED = [f"{c}%s{_RESET} " for c in ("\033[91m", "\033[92m", "\033[93m", "\033[94m", "\033[95m", "\033[96m")]
 
-    for i, item in enumerate(data):
-        color = colors[i % len(colors)]
-        sys.stdout.write(f"{color}{item}{reset} ")
+def _animate() -> bool:
+    """Play the dotted loading effect only for a person at a terminal."""
+    return sys.stdout.isatty() and os.getenv("STUDY_AI_ANIMATE_CLI", "1") == "1"
 
-        # dotted loading effect
-        for dot in range(3):
-            sys.stdout.write(".")
-            sys.stdout.flush()
-            time.sleep(0.3)
+def _dots() -> None:
+    # dotted loading effect
+    for dot in range(3):
+        sys.stdout.write(".")
+        sys.stdout.flush()
+        time.sleep(0.3)
+    sys.stdout.write("\n")
+    sys.stdout.flush()
 
-        sys.stdout.write("\n")
+def visualize_data(data):
+    """A simple function to visualize data in the CLI with colors and dotted loading."""
+    if not _animate():
+        # Piped or disabled: no sleeps, one write
+        sys.stdout.write("".join(_COLORED[i % len(_COLORED)] % (item,) + "...\n" for i, item in enumerate(data)))
         sys.stdout.flush()
+        return
+
+    for i, item in enumerate(data):
+        sys.stdout.write(_COLORED[i % len(_COLORED)] % (item,))
+        _dots()
 
     return
 def single_line_viz(text):
     """Visualize a single line of text with a loading effect."""
-    sys.stdout.write(text)
-    for dot in range(3):
-        sys.stdout.write(".")
+    if not _animate():
+        sys.stdout.write(f"{text}...\n")
         sys.stdout.flush()
-        time.sleep(0.3)
-    sys.stdout.write("\n")
-    sys.stdout.flush()
+        return
+    sys.stdout.write(text)
+    _dots()
     return
 # Example usage
 if __name__ == "__main__":
@@ -34,19 +34,34 @@ class MindMapGenerator:
             topics: List of Topic objects
             root_name: Name of the root node
         """
-        self.graph.add_node(root_name, level=0)
+        # Collect everything first and insert in two bulk calls
+        nodes = [(root_name, {'level': 0})]
+        edges = []
         
         for topic in topics:
             # Add main topic
-            self.graph.add_node(topic.name, 
-                              summary=topic.summary,
-                              level=1)
-            self.graph.add_edge(root_name, topic.name)
+            nodes.append((topic.name, {'summary': topic.summary, 'level': 1}))
+            edges.append((root_name, topic.name))
             
             # Add subtopics if any
-            for subtopic in topic.subtopics:
-                self.graph.add_node(subtopic, level=2)
-                self.graph.add_edge(topic.name, subtopic)
+            nodes.extend((subtopic, {'level': 2}) for subtopic in topic.subtopics)
+            edges.extend((topic.name, subtopic) for subtopic in topic.subtopics)
+        
+        self.graph.add_nodes_from(nodes)
+        self.graph.add_edges_from(edges)
+    
+    def to_json_bytes(self) -> bytes:
+        """
+        Serialize the mind map to node-link JSON.
+        
+        Returns:
+            UTF-8 encoded, 2-space indented JSON
+        """
+        import orjson
+        from networkx.readwrite import json_graph
+        
+        data = json_graph.node_link_data(self.graph)
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
     
     def export_to_json(self, output_path: str) -> None:
         """
@@ -55,14 +70,8 @@ class MindMapGenerator:
         Args:
             output_path: Path to save the JSON file
         """
-        import json
-        from networkx.readwrite import json_graph
-        
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-        data = json_graph.node_link_data(self.graph)
-        
-        with open(output_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        Path(output_path).write_bytes(self.to_json_bytes())
     
     def export_to_graphviz(self, output_path: str) -> None:
         """
@@ -84,20 +93,14 @@ class MindMapGenerator:
             Dictionary with nodes and edges
         """
         nodes = []
-        edges = []
-        
         for node, data in self.graph.nodes(data=True):
-            nodes.append({
-                'id': node,
-                'label': node,
-                **data
-            })
+            # update() rather than {'id': ..., **data}: cheaper for small dicts,
+            # and node attributes still take precedence as before
+            entry = {'id': node, 'label': node}
+            entry.update(data)
+            nodes.append(entry)
         
-        for source, target in self.graph.edges():
-            edges.append({
-                'source': source,
-                'target': target
-            })
+        edges = [{'source': source, 'target': target} for source, target in self.graph.edges()]
         
         return {'nodes': nodes, 'edges': edges}
     
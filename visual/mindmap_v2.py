@@ -1,37 +1,47 @@
+import functools
 from mermaid.graph import Graph
 from core.models import Topic
 from typing import List
+from pathlib import Path
+
+# Characters that might break mermaid syntax; newlines become spaces
+_SANITIZE_TABLE = str.maketrans({'(': None, ')': None, '[': None, ']': None, '"': "'", '\n': ' '})
+
+# Mindmap line templates: topics under the root, key points under topics
+_TOPIC_FMT = "    %s\n"
+_KP_FMT = "      %s\n"
+
+@functools.lru_cache(maxsize=4096)
+def _sanitize(text: str) -> str:
+    # One translate pass; key points repeat across related topics, so
+    # results are memoized
+    return text.translate(_SANITIZE_TABLE)
 
 class MindMapGenerator2:
     def __init__(self, topics: List[Topic]):
         self.topics = topics
 
     def generate_script(self) -> str:
-        # Use mindmap syntax
-        script = "mindmap\n"
-        script += "  root((Syllabus))\n"
+        # Use mindmap syntax; lines are collected and joined once
+        parts = ["mindmap\n", "  root((Syllabus))\n"]
         for topic in self.topics:
             # Basic sanitization for mermaid text
-            safe_name = self._sanitize(topic.name)
-            script += f"    {safe_name}\n"
+            parts.append(_TOPIC_FMT % self._sanitize(topic.name))
             if topic.key_points:
                 for kp in topic.key_points:
                     safe_kp = self._sanitize(kp)
                     # Truncate if too long to keep diagram readable
-                    if len(safe_kp) > 50:
-                        safe_kp = safe_kp[:47] + "..."
-                    script += f"      {safe_kp}\n"
-        return script
+                    parts.append(_KP_FMT % (safe_kp[:47] + "..." if len(safe_kp) > 50 else safe_kp))
+        return "".join(parts)
 
     def _sanitize(self, text: str) -> str:
         # Replace characters that might break mermaid syntax
-        # Also remove newlines
-        return text.replace('(', '').replace(')', '').replace('[', '').replace(']', '').replace('"', "'").replace('\n', ' ')
+        # Also remove newlines (see module-level _sanitize)
+        return _sanitize(text)
 
     def save(self, filepath: str):
         # Ensure directory exists
-        import os
-        os.makedirs(os.path.dirname(filepath) if os.path.dirname(filepath) else '.', exist_ok=True)
+        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
         
         script = self.generate_script()
         graph = Graph("MindMap", script)
@@ -43,20 +53,19 @@ class MindMapGenerator2:
         """
         Save the mindmap as a Markdown file with a Mermaid code block.
         """
-        import os
-        os.makedirs(os.path.dirname(filepath) if os.path.dirname(filepath) else '.', exist_ok=True)
+        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
         
         script = self.generate_script()
         
-        content = f"# {title}\n\n```mermaid\n{script}\n```\n"
+        parts = [f"# {title}\n\n```mermaid\n{script}\n```\n"]
         # Also append any other specific diagrams the topic might have
         # This assumes we are generating for a single topic or iterating and just appending the first one's extras if any
         if len(self.topics) == 1 and self.topics[0].mermaid_diagrams:
             for diag in self.topics[0].mermaid_diagrams:
-                content += f"\n### {diag.title or diag.type.capitalize()}\n"
-                content += f"```mermaid\n{diag.script}\n```\n"
+                parts.append(f"\n### {diag.title or diag.type.capitalize()}\n")
+                parts.append(f"```mermaid\n{diag.script}\n```\n")
         
         with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+            f.write("".join(parts))
         
         return filepath